@@ -16,20 +16,35 @@ Run: python aiden_cli.py
 import asyncio
 import json
 import os
+import re
+import stat
 from backend.config import settings
-
-try:
-    if settings.USE_UVLOOP:
-        import uvloop
-        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
-except Exception:
-    pass
 import sys
+import tempfile
+import time
 import httpx
-import subprocess
+
+try:
+    import orjson
+    _loads = orjson.loads
+
+    def _dumps(obj, indent: bool = True) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj, indent: bool = True) -> bytes:
+        return json.dumps(obj, indent=2 if indent else None).encode()
+
+try:
+    import h2  # noqa: F401 - lets httpx negotiate HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional, AsyncGenerator
+from collections import deque
+from typing import Dict, Any, Optional, AsyncGenerator, Tuple, Deque, List, BinaryIO
 import logging
 
 # Rich imports for beautiful CLI
@@ -37,32 +52,69 @@ from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
 from rich.live import Live
-from rich.prompt import Prompt, Confirm
+from rich.prompt import Prompt
 from rich.table import Table
-from rich.layout import Layout
 from rich.align import Align
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
-from rich.markdown import Markdown
 from rich.columns import Columns
 
 # Configure logging to be less verbose
 logging.basicConfig(level=logging.WARNING)
 
+# KEY=value assignments in .env, with or without a leading `export`, parsed in a single pass (comment lines never match)
+_ENV_LINE_PATTERN = re.compile(r"^[ \t]*(?:export[ \t]+)?([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)[ \t\r]*$", re.MULTILINE)
+
+# Seconds a backend status check stays fresh while navigating menus
+STATUS_CACHE_TTL = 2.0
+# Seconds to wait for a freshly spawned backend to come online
+BACKEND_START_TIMEOUT = 10.0
+# Fixed menu choice sets
+MAIN_MENU_CHOICES = ("1", "2", "3", "4", "5", "6", "7")
+CONFIG_MENU_CHOICES = ("1", "2", "3", "4", "5")
+# API key rows of the configuration status table:
+# (component, check_env_configuration key, details when configured, details when missing)
+CONFIG_STATUS_ROWS = (
+    ("OpenRouter API", "openrouter_configured", "Llama 4 Maverick (FREE)", "Get from openrouter.ai"),
+    ("ElevenLabs API", "elevenlabs_configured", "Voice synthesis ready", "Get from elevenlabs.io"),
+    ("Google Gemini", "google_configured", "Fallback model ready", "Get from aistudio.google.com"),
+)
+# Most recent chat turns kept in memory; the full session is journaled to a temporary file for export
+HISTORY_MAX_ENTRIES = settings.CLI_HISTORY_MAX
+# Seconds between redraws of a streaming response; slow terminals get the longer interval
+STREAM_REFRESH_INTERVAL = 0.1
+SLOW_TERMINAL_REFRESH_INTERVAL = 0.5
+
 class AidenCLI:
     def __init__(self):
         self.console = Console()
         self.backend_url = "http://localhost:8000"
         self.session_id = "main"
-        self.conversation_history = []
+        self.conversation_history: Deque[Dict[str, Any]] = deque(maxlen=HISTORY_MAX_ENTRIES)
         self.voice_mode_active = False
+        self.client: Optional[httpx.AsyncClient] = None
+        self._status_cache: Optional[Dict[str, Any]] = None
+        self._status_ts = 0.0
+        self._env_cache: Optional[Tuple[float, Dict[str, str]]] = None
+        self._backend_process: Optional[asyncio.subprocess.Process] = None
+        self._journal_path: Optional[Path] = None
+        self._journal_file: Optional[BinaryIO] = None
+        self._cwd = str(Path.cwd())
+        # Remote sessions and legacy Windows consoles can't keep up with fast redraws
+        slow_terminal = (
+            not self.console.is_terminal
+            or self.console.legacy_windows
+            or "SSH_CONNECTION" in os.environ
+        )
+        self._stream_refresh_interval = SLOW_TERMINAL_REFRESH_INTERVAL if slow_terminal else STREAM_REFRESH_INTERVAL
+        self._uvicorn_argv = (
+            sys.executable, "-m", "uvicorn",
+            "backend.api.main:app",
+            "--host", "0.0.0.0",
+            "--port", "8000",
+            "--log-level", "warning"
+        )
         
-    def clear_screen(self):
-        """Clear the terminal screen"""
-        os.system('clear' if os.name == 'posix' else 'cls')
-    
-    def show_header(self):
-        """Display the enhanced AIDEN header"""
-        header = Panel(
+        # Static renderables are built once and reused on every redraw
+        self._header_panel = Panel(
             Align.center(
                 Text("🤖 AIDEN V2 - AI Personal Assistant", style="bold cyan") + "\n" +
                 Text("Powered by OpenRouter (Llama 4 Maverick) + ElevenLabs Voice", style="dim") + "\n\n" +
@@ -71,71 +123,165 @@ class AidenCLI:
             style="bright_blue",
             padding=(1, 2)
         )
-        self.console.print(header)
+        self._config_options_panel = Panel(
+            """[bold cyan]Configuration Options[/bold cyan]
+
+[1] 🔧 Quick Setup (Run voice setup script)
+[2] 📝 Manual API Key Entry
+[3] 🧪 Test Current Configuration
+[4] 📊 Show Detailed Status
+[5] 🔙 Back to Main Menu
+
+Choose an option (1-5):""",
+            style="bright_blue",
+            padding=(1, 2)
+        )
+        self._main_menu_panel = Panel(
+            """[bold cyan]AIDEN V2 Main Menu[/bold cyan]
+
+[1] ⚙️  Configure AIDEN (API Keys & Voice Setup)
+[2] 🧪 Test System (Backend, Chat, Voice)
+[3] 💬 Start Text Chat (Streaming conversation)
+[4] 🎤 Start Voice Mode (Real-time voice chat)
+[5] 📁 Export Logs (Save conversation history)
+[6] 📊 System Status (Detailed status view)
+[7] 🚪 Exit
+
+Choose an option (1-7):""",
+            style="bright_blue",
+            padding=(1, 2)
+        )
+
+    async def __aenter__(self) -> "AidenCLI":
+        """Open the shared HTTP client so every backend call reuses keep-alive connections"""
+        self.client = httpx.AsyncClient(
+            base_url=self.backend_url,
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            timeout=httpx.Timeout(60.0, connect=2.0, pool=5.0)
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """Close the shared HTTP client and delete the chat journal"""
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+        if self._journal_file:
+            self._journal_file.close()
+            self._journal_file = None
+            # Only export_logs reads the journal; exported sessions live on in their .json file
+            self._journal_path.unlink(missing_ok=True)
+            self._journal_path = None
+        
+    def refresh_cwd(self):
+        """Re-resolve the working directory used as the backend's PYTHONPATH"""
+        self._cwd = str(Path.cwd())
+
+    async def _pause(self, msg: str = "Press Enter to continue..."):
+        """Wait for Enter on a worker thread so the event loop keeps running"""
+        await asyncio.to_thread(input, msg)
+
+    def clear_screen(self):
+        """Clear the terminal screen"""
+        self.console.clear()
+    
+    def show_header(self):
+        """Display the enhanced AIDEN header"""
+        self.console.print(self._header_panel)
         self.console.print()
 
-    async def check_backend_status(self) -> Dict[str, Any]:
-        """Check backend status including voice capabilities"""
+    async def check_backend_status(self, force: bool = False) -> Dict[str, Any]:
+        """Check backend status including voice capabilities (cached for a couple of seconds)"""
+        if not force and self._status_cache is not None and time.monotonic() - self._status_ts < STATUS_CACHE_TTL:
+            return self._status_cache
+        
+        self._status_cache = await self._fetch_backend_status()
+        self._status_ts = time.monotonic()
+        return self._status_cache
+
+    async def _fetch_backend_status(self) -> Dict[str, Any]:
+        """Query the backend for health and voice status"""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                # Check basic health
-                health_response = await client.get(f"{self.backend_url}/health")
-                if health_response.status_code != 200:
-                    return {"status": "offline", "voice_available": False}
-                
-                health_data = health_response.json()
-                
-                # Check voice status
-                try:
-                    voice_response = await client.get(f"{self.backend_url}/voice/status")
-                    voice_data = voice_response.json() if voice_response.status_code == 200 else {}
-                except:
-                    voice_data = {"voice_mode_available": False}
-                
-                return {
-                    "status": "online",
-                    "health": health_data,
-                    "voice_available": voice_data.get("voice_mode_available", False),
-                    "voice_config": voice_data.get("configuration", {})
-                }
-        except:
+            # Check basic health and voice status concurrently over the shared pool
+            health_response, voice_response = await asyncio.gather(
+                self.client.get("/health", timeout=5.0),
+                self.client.get("/voice/status", timeout=5.0),
+                return_exceptions=True
+            )
+            if isinstance(health_response, Exception) or health_response.status_code != 200:
+                return {"status": "offline", "voice_available": False}
+            
+            health_data = health_response.json()
+            
+            if isinstance(voice_response, Exception):
+                voice_data = {"voice_mode_available": False}
+            else:
+                voice_data = voice_response.json() if voice_response.status_code == 200 else {}
+            
+            return {
+                "status": "online",
+                "health": health_data,
+                "voice_available": voice_data.get("voice_mode_available", False),
+                "voice_config": voice_data.get("configuration", {})
+            }
+        except (httpx.HTTPError, json.JSONDecodeError):
             return {"status": "offline", "voice_available": False}
 
+    async def _backend_port_open(self) -> bool:
+        """Check whether the backend is accepting TCP connections"""
+        url = httpx.URL(self.backend_url)
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(url.host, url.port or 80), 0.5)
+        except (OSError, asyncio.TimeoutError):
+            return False
+        writer.close()
+        return True
+
     async def start_backend(self) -> bool:
         """Start the backend server with enhanced monitoring"""
         self.console.print("🚀 Starting AIDEN backend...", style="yellow")
         
         try:
             env = os.environ.copy()
-            env['PYTHONPATH'] = str(Path.cwd())
+            env['PYTHONPATH'] = self._cwd
             
-            # Start the backend process
-            process = subprocess.Popen([
-                sys.executable, "-m", "uvicorn", 
-                "backend.api.main:app", 
-                "--host", "0.0.0.0", 
-                "--port", "8000",
-                "--log-level", "warning"
-            ], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            # Start the backend process without blocking the event loop
+            self._backend_process = await asyncio.create_subprocess_exec(
+                *self._uvicorn_argv,
+                env=env,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL
+            )
             
-            # Wait for backend to start with progress
+            # Wait for backend to start with progress, backing off exponentially between probes
+            from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            deadline = started + BACKEND_START_TIMEOUT
+            delay = 0.05
             with Progress(
                 SpinnerColumn(),
                 TextColumn("[progress.description]{task.description}"),
                 BarColumn(),
                 TaskProgressColumn(),
             ) as progress:
-                task = progress.add_task("Starting backend...", total=20)
+                task = progress.add_task("Starting backend...", total=BACKEND_START_TIMEOUT)
 
-                for i in range(20):
-                    await asyncio.sleep(0.5)
-                    progress.update(task, advance=1)
-                    
-                    status = await self.check_backend_status()
-                    if status["status"] == "online":
+                while loop.time() < deadline:
+                    # A bare TCP connect is far cheaper than an HTTP status round-trip
+                    status = await self.check_backend_status(force=True) if await self._backend_port_open() else None
+                    progress.update(task, completed=loop.time() - started)
+                    if status and status["status"] == "online":
                         progress.update(task, description="✅ Backend started successfully!")
                         self.console.print("✅ Backend online with voice capabilities!" if status["voice_available"] else "✅ Backend online (voice configuration needed)", style="green")
                         return True
+                    
+                    if self._backend_process.returncode is not None:
+                        break  # The child already exited; no point waiting out the timeout
+                    
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 1.5, 0.5)
             
             self.console.print("❌ Failed to start backend", style="red")
             return False
@@ -144,24 +290,36 @@ class AidenCLI:
             self.console.print(f"❌ Error starting backend: {e}", style="red")
             return False
 
+    def read_env_file(self) -> Dict[str, str]:
+        """Parse .env into a dict, re-reading only when the file's mtime changes"""
+        env_path = Path(".env")
+        try:
+            mtime = env_path.stat().st_mtime
+        except FileNotFoundError:
+            self._env_cache = None
+            return {}
+        
+        if self._env_cache is not None and self._env_cache[0] == mtime:
+            return self._env_cache[1]
+        
+        env = dict(_ENV_LINE_PATTERN.findall(env_path.read_text()))
+        self._env_cache = (mtime, env)
+        return env
+
     def check_env_configuration(self) -> Dict[str, bool]:
         """Check current environment configuration"""
-        env_path = Path(".env")
-        config_status = {
-            "env_exists": env_path.exists(),
-            "openrouter_configured": False,
-            "elevenlabs_configured": False,
-            "google_configured": False
-        }
+        env = self.read_env_file()
         
-        if env_path.exists():
-            with open(env_path) as f:
-                content = f.read()
-                config_status["openrouter_configured"] = "OPENROUTER_API_KEY=" in content and not "your_openrouter" in content
-                config_status["elevenlabs_configured"] = "ELEVENLABS_API_KEY=" in content and not "your_elevenlabs" in content
-                config_status["google_configured"] = "GOOGLE_API_KEY=" in content and not "your_google" in content
+        def configured(key: str, placeholder: str) -> bool:
+            value = env.get(key, "").strip("\"'")
+            return bool(value) and not value.startswith(placeholder)
         
-        return config_status
+        return {
+            "env_exists": self._env_cache is not None,
+            "openrouter_configured": configured("OPENROUTER_API_KEY", "your_openrouter"),
+            "elevenlabs_configured": configured("ELEVENLABS_API_KEY", "your_elevenlabs"),
+            "google_configured": configured("GOOGLE_API_KEY", "your_google")
+        }
 
     async def show_config_menu(self):
         """Enhanced configuration menu with voice setup"""
@@ -181,20 +339,11 @@ class AidenCLI:
         config_table.add_column("Status", width=15)
         config_table.add_column("Details", style="dim")
         
-        # OpenRouter status
-        or_status = "✅ Configured" if config_status["openrouter_configured"] else "❌ Not configured"
-        or_details = "Llama 4 Maverick (FREE)" if config_status["openrouter_configured"] else "Get from openrouter.ai"
-        config_table.add_row("OpenRouter API", or_status, or_details)
-        
-        # ElevenLabs status
-        el_status = "✅ Configured" if config_status["elevenlabs_configured"] else "❌ Not configured"
-        el_details = "Voice synthesis ready" if config_status["elevenlabs_configured"] else "Get from elevenlabs.io"
-        config_table.add_row("ElevenLabs API", el_status, el_details)
-        
-        # Google status
-        google_status = "✅ Configured" if config_status["google_configured"] else "❌ Not configured"
-        google_details = "Fallback model ready" if config_status["google_configured"] else "Get from aistudio.google.com"
-        config_table.add_row("Google Gemini", google_status, google_details)
+        for component, key, ready_details, missing_details in CONFIG_STATUS_ROWS:
+            if config_status[key]:
+                config_table.add_row(component, "✅ Configured", ready_details)
+            else:
+                config_table.add_row(component, "❌ Not configured", missing_details)
         
         # Backend status
         backend_text = "✅ Online" if backend_status["status"] == "online" else "❌ Offline"
@@ -205,22 +354,8 @@ class AidenCLI:
         self.console.print()
         
         # Configuration options
-        options_panel = Panel(
-            """[bold cyan]Configuration Options[/bold cyan]
-
-[1] 🔧 Quick Setup (Run voice setup script)
-[2] 📝 Manual API Key Entry
-[3] 🧪 Test Current Configuration
-[4] 📊 Show Detailed Status
-[5] 🔙 Back to Main Menu
-
-Choose an option (1-5):""",
-            style="bright_blue",
-            padding=(1, 2)
-        )
-        
-        self.console.print(options_panel)
-        choice = Prompt.ask("Choice", choices=["1", "2", "3", "4", "5"], default="1")
+        self.console.print(self._config_options_panel)
+        choice = Prompt.ask("Choice", choices=CONFIG_MENU_CHOICES, default="1")
         
         if choice == "1":
             await self.run_voice_setup()
@@ -237,10 +372,10 @@ Choose an option (1-5):""",
         self.console.print("🔧 Running AIDEN Voice Setup...", style="yellow")
         
         try:
-            result = subprocess.run([sys.executable, "setup_voice.py"], 
-                                  capture_output=False, text=True)
+            process = await asyncio.create_subprocess_exec(sys.executable, "setup_voice.py")
+            returncode = await process.wait()
             
-            if result.returncode == 0:
+            if returncode == 0:
                 self.console.print("✅ Voice setup completed!", style="green")
             else:
                 self.console.print("❌ Voice setup encountered an error", style="red")
@@ -249,7 +384,36 @@ Choose an option (1-5):""",
         except Exception as e:
             self.console.print(f"❌ Error running setup: {e}", style="red")
         
-        input("\nPress Enter to continue...")
+        await self._pause("\nPress Enter to continue...")
+
+    @staticmethod
+    def _merge_env_updates(content: str, updates: Dict[str, str]) -> str:
+        """
+        Replace the values of existing keys in .env content and append any new keys.
+        Every assignment of a key is rewritten, since python-dotenv keeps the last one,
+        and each line keeps its own line ending.
+        """
+        missing = dict(updates)
+        
+        def replace(match: "re.Match[str]") -> str:
+            key = match.group(1)
+            if key not in updates:
+                return match.group(0)
+            missing.pop(key, None)
+            line = match.group(0)
+            # Keep any indentation and `export ` prefix in front of the key
+            prefix = line[:match.start(1) - match.start()]
+            # `$` stops before "\n", so the "\r" of a CRLF line is inside the match
+            ending = "\r" if line.endswith("\r") else ""
+            return f"{prefix}{key}={updates[key]}{ending}"
+        
+        merged = _ENV_LINE_PATTERN.sub(replace, content)
+        if missing:
+            newline = "\r\n" if "\r\n" in content else "\n"
+            if merged and not merged.endswith("\n"):
+                merged += newline
+            merged += "".join(f"{key}={value}{newline}" for key, value in missing.items())
+        return merged
 
     async def manual_api_setup(self):
         """Manual API key configuration"""
@@ -259,12 +423,6 @@ Choose an option (1-5):""",
         config_status = self.check_env_configuration()
         env_path = Path(".env")
         
-        # Read existing .env if present
-        existing_content = ""
-        if env_path.exists():
-            with open(env_path) as f:
-                existing_content = f.read()
-        
         self.console.print("📋 API Key Sources:")
         self.console.print("   OpenRouter: https://openrouter.ai/ (FREE Llama 4 Maverick)")
         self.console.print("   ElevenLabs: https://elevenlabs.io/ (10k chars/month free)")
@@ -290,7 +448,12 @@ Choose an option (1-5):""",
                 updates["GOOGLE_API_KEY"] = google_key.strip()
         
         # Update .env file
-        if updates:
+        if updates and env_path.exists():
+            # Only touch the keys that changed, keeping the rest of the file intact
+            # newline="" keeps CRLF line endings as they are in the file
+            with open(env_path, newline="") as env_file:
+                env_content = self._merge_env_updates(env_file.read(), updates)
+        elif updates:
             env_template = """# AIDEN V2 Configuration
 USE_OPENROUTER=True
 OPENROUTER_API_KEY={openrouter_key}
@@ -326,15 +489,28 @@ ENABLE_MARKDOWN=True
                 elevenlabs_key=elevenlabs_key,
                 google_key=google_key
             )
-            
-            with open(env_path, 'w') as f:
-                f.write(env_content)
+        
+        if updates:
+            # Write atomically so an interrupted save cannot leave a truncated .env behind.
+            # mkstemp creates the file 0600, so the keys are never readable by others, not even briefly;
+            # an existing .env's own mode is applied before anything is written
+            fd, tmp_name = tempfile.mkstemp(prefix=".env.", suffix=".tmp", dir=env_path.resolve().parent)
+            try:
+                with os.fdopen(fd, "w", newline="") as tmp_file:
+                    if env_path.exists():
+                        os.fchmod(tmp_file.fileno(), stat.S_IMODE(os.stat(env_path).st_mode))
+                    tmp_file.write(env_content)
+                os.replace(tmp_name, env_path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+            self._env_cache = None
             
             self.console.print("✅ Configuration saved!", style="green")
         else:
             self.console.print("No changes made.", style="yellow")
         
-        input("\nPress Enter to continue...")
+        await self._pause("\nPress Enter to continue...")
 
     async def test_configuration(self):
         """Test current configuration"""
@@ -344,6 +520,7 @@ ENABLE_MARKDOWN=True
         self.console.print("🧪 Testing AIDEN Configuration...", style="bold yellow")
         self.console.print()
         
+        from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -359,28 +536,28 @@ ENABLE_MARKDOWN=True
                 progress.update(task1, description="Starting backend...")
                 if not await self.start_backend():
                     self.console.print("❌ Cannot start backend", style="red")
-                    input("Press Enter to continue...")
+                    await self._pause()
                     return
-                backend_status = await self.check_backend_status()
+                backend_status = await self.check_backend_status(force=True)
             
             progress.update(task1, advance=1, description="✅ Backend online")
             
             # Test chat functionality
             task2 = progress.add_task("Testing chat...", total=1)
             try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.post(
-                        f"{self.backend_url}/chat",
-                        json={"message": "Hello! Just testing - respond with 'Test successful'", "session_id": "test"}
-                    )
-                    
-                    if response.status_code == 200:
-                        progress.update(task2, advance=1, description="✅ Chat working")
-                        chat_working = True
-                    else:
-                        progress.update(task2, advance=1, description="❌ Chat failed")
-                        chat_working = False
-            except Exception:
+                response = await self.client.post(
+                    "/chat",
+                    json={"message": "Hello! Just testing - respond with 'Test successful'", "session_id": "test"},
+                    timeout=30.0
+                )
+                
+                if response.status_code == 200:
+                    progress.update(task2, advance=1, description="✅ Chat working")
+                    chat_working = True
+                else:
+                    progress.update(task2, advance=1, description="❌ Chat failed")
+                    chat_working = False
+            except httpx.HTTPError:
                 progress.update(task2, advance=1, description="❌ Chat error")
                 chat_working = False
             
@@ -388,14 +565,14 @@ ENABLE_MARKDOWN=True
             if backend_status.get("voice_available"):
                 task3 = progress.add_task("Testing voice...", total=1)
                 try:
-                    async with httpx.AsyncClient(timeout=10.0) as client:
-                        voice_response = await client.post(
-                            f"{self.backend_url}/voice/tts",
-                            json={"text": "Test"}
-                        )
-                        voice_working = voice_response.status_code == 200
-                        progress.update(task3, advance=1, description="✅ Voice working" if voice_working else "❌ Voice failed")
-                except Exception:
+                    voice_response = await self.client.post(
+                        "/voice/tts",
+                        json={"text": "Test"},
+                        timeout=10.0
+                    )
+                    voice_working = voice_response.status_code == 200
+                    progress.update(task3, advance=1, description="✅ Voice working" if voice_working else "❌ Voice failed")
+                except httpx.HTTPError:
                     progress.update(task3, advance=1, description="❌ Voice error")
                     voice_working = False
             else:
@@ -413,7 +590,7 @@ ENABLE_MARKDOWN=True
         results_table.add_row("Voice", "✅ Working" if voice_working else "❌ Not available", "TTS/STT capabilities")
         
         self.console.print(results_table)
-        input("\nPress Enter to continue...")
+        await self._pause("\nPress Enter to continue...")
 
     async def show_detailed_status(self):
         """Show detailed system status"""
@@ -481,7 +658,7 @@ Whisper: {voice_config.get('whisper_model', 'Not configured')}""",
         self.console.print()
         self.console.print(api_panel)
         
-        input("\nPress Enter to continue...")
+        await self._pause("\nPress Enter to continue...")
 
     async def start_voice_mode(self):
         """Start voice conversation mode"""
@@ -492,7 +669,7 @@ Whisper: {voice_config.get('whisper_model', 'Not configured')}""",
         backend_status = await self.check_backend_status()
         if not backend_status.get("voice_available"):
             self.console.print("❌ Voice mode not available. Please configure ElevenLabs API key.", style="red")
-            input("Press Enter to continue...")
+            await self._pause()
             return
         
         self.console.print("🎤 Voice Mode - Real-time Conversation", style="bold green")
@@ -503,12 +680,11 @@ Whisper: {voice_config.get('whisper_model', 'Not configured')}""",
         
         # Start voice mode
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(f"{self.backend_url}/voice/start-voice-mode")
-                if response.status_code != 200:
-                    self.console.print("❌ Failed to start voice mode", style="red")
-                    input("Press Enter to continue...")
-                    return
+            response = await self.client.post("/voice/start-voice-mode", timeout=10.0)
+            if response.status_code != 200:
+                self.console.print("❌ Failed to start voice mode", style="red")
+                await self._pause()
+                return
             
             self.voice_mode_active = True
             
@@ -530,39 +706,52 @@ Whisper: {voice_config.get('whisper_model', 'Not configured')}""",
         finally:
             # Stop voice mode
             try:
-                async with httpx.AsyncClient(timeout=5.0) as client:
-                    await client.post(f"{self.backend_url}/voice/stop-voice-mode")
-            except:
+                await self.client.post("/voice/stop-voice-mode", timeout=5.0)
+            except httpx.HTTPError:
                 pass
             self.voice_mode_active = False
-            input("Press Enter to continue...")
+            await self._pause()
 
     async def stream_chat_response(self, message: str) -> AsyncGenerator[Dict[str, Any], None]:
         """Stream chat response from backend"""
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                async with client.stream(
-                    "POST",
-                    f"{self.backend_url}/chat-stream",
-                    json={"message": message, "session_id": self.session_id},
-                    headers={"Accept": "text/event-stream"}
-                ) as response:
-                    if response.status_code != 200:
-                        yield {"type": "error", "detail": f"Backend error: {response.status_code}"}
-                        return
-                    
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            try:
-                                event_data = line[6:]  # Remove "data: " prefix
-                                if event_data.strip():
-                                    event = json.loads(event_data)
-                                    yield event
-                            except json.JSONDecodeError:
-                                continue
-                            except Exception as e:
-                                yield {"type": "error", "detail": f"Parse error: {e}"}
-        except Exception as e:
+            async with self.client.stream(
+                "POST",
+                "/chat-stream",
+                json={"message": message, "session_id": self.session_id},
+                headers={"Accept": "text/event-stream"}
+            ) as response:
+                if response.status_code != 200:
+                    yield {"type": "error", "detail": f"Backend error: {response.status_code}"}
+                    return
+                
+                # Split lines at the byte level so non-data SSE framing is never decoded.
+                # No chunk_size here: httpx would hold events back until that many bytes
+                # arrived, and the transport already reads up to 64 KiB per recv().
+                buffer = bytearray()
+                async for chunk in response.aiter_bytes():
+                    buffer += chunk
+                    start = 0
+                    while (newline := buffer.find(b"\n", start)) != -1:
+                        line_start, start = start, newline + 1
+                        # Keep-alives, comments and other framing are skipped without copying
+                        if not buffer.startswith(b"data: ", line_start, newline):
+                            continue
+                        event_data = bytes(buffer[line_start + 6:newline]).strip()  # Remove "data: " prefix
+                        if not event_data:
+                            continue
+                        try:
+                            event = _loads(event_data)
+                        except json.JSONDecodeError:
+                            continue
+                        event_type = event.get("type")
+                        if isinstance(event_type, str):
+                            # Interned so the handler table lookup matches by identity
+                            event["type"] = sys.intern(event_type)
+                        yield event
+                    # Drop all consumed lines in one shift instead of one per line
+                    del buffer[:start]
+        except httpx.HTTPError as e:
             yield {"type": "error", "detail": f"Connection error: {e}"}
 
     async def start_chat(self):
@@ -575,7 +764,7 @@ Whisper: {voice_config.get('whisper_model', 'Not configured')}""",
         if backend_status["status"] == "offline":
             if not await self.start_backend():
                 self.console.print("❌ Cannot start backend. Please check your configuration.", style="red")
-                input("Press Enter to continue...")
+                await self._pause()
                 return
         
         self.console.print("💬 Chat with AIDEN", style="bold green")
@@ -608,87 +797,127 @@ Whisper: {voice_config.get('whisper_model', 'Not configured')}""",
                     continue
                 
                 # Add to history
-                self.conversation_history.append({
+                turn = {
                     "timestamp": datetime.now().isoformat(),
                     "user": user_input,
                     "agent": ""
-                })
+                }
+                self.conversation_history.append(turn)
                 
                 # Show streaming response
                 self.console.print()
                 
                 # Enhanced streaming display
                 thinking_panel = Panel("🤔 Thinking...", title="AIDEN Status", style="yellow")
+                response_chunks = []
                 response_text = ""
+                dirty = False
+                showing_response = False
+                response_body = Text()
+                response_panel = Panel(response_body, title="🤖 AIDEN", style="bright_green")
                 
-                with Live(thinking_panel, console=self.console, refresh_per_second=4) as live:
-                    async for event in self.stream_chat_response(user_input):
-                        event_type = event.get("type", "unknown")
-                        
-                        if event_type == "thinking_indicator":
-                            content = event.get("content", "Thinking...")
-                            live.update(Panel(f"🤔 {content}", title="AIDEN Status", style="yellow"))
-                        
-                        elif event_type == "tool_start":
-                            tool_name = event.get("name", "Unknown")
-                            tool_input = event.get("input", "")
-                            tool_panel = Panel(
-                                f"🔧 Using: {tool_name}\nInput: {tool_input[:100]}{'...' if len(tool_input) > 100 else ''}",
-                                title="Tool Execution",
-                                style="blue"
-                            )
-                            live.update(tool_panel)
-                        
-                        elif event_type == "tool_end":
-                            tool_name = event.get("name", "Unknown")
-                            result = event.get("result", "")
-                            tool_panel = Panel(
-                                f"✅ Completed: {tool_name}\nResult: {result[:200]}{'...' if len(result) > 200 else ''}",
-                                title="Tool Result",
-                                style="green"
-                            )
-                            live.update(tool_panel)
-                            await asyncio.sleep(1)  # Show result briefly
-                        
-                        elif event_type == "llm_chunk":
-                            chunk = event.get("content", "")
-                            response_text += chunk
-                            
-                            # Update with streaming response
-                            response_panel = Panel(
-                                response_text + "▋",  # Add cursor
-                                title="🤖 AIDEN",
-                                style="bright_green"
-                            )
-                            live.update(response_panel)
-                        
-                        elif event_type == "final_response":
-                            final_content = event.get("content", response_text)
-                            if final_content:
-                                response_text = final_content
-                            
-                            # Final response without cursor
-                            final_panel = Panel(
-                                response_text,
-                                title="🤖 AIDEN",
-                                style="bright_green"
-                            )
-                            live.update(final_panel)
-                            break
+                # Rendering is driven explicitly below instead of by Live's background thread
+                with Live(thinking_panel, console=self.console, auto_refresh=False) as live:
+                    def draw_response():
+                        nonlocal dirty
+                        dirty = False
+                        response_body.plain = "".join(response_chunks) + "▋"  # Add cursor
+                        live.update(response_panel, refresh=True)
+                    
+                    async def refresh_response():
+                        """Redraw the streaming panel at a fixed cadence instead of per chunk"""
+                        while True:
+                            await asyncio.sleep(self._stream_refresh_interval)
+                            if dirty:
+                                draw_response()
+                    
+                    def show_status(panel: Panel):
+                        nonlocal dirty, showing_response
+                        # Status panels replace the response; don't let a pending redraw hide them
+                        dirty = showing_response = False
+                        live.update(panel, refresh=True)
+                    
+                    async def on_thinking(event: Dict[str, Any]) -> bool:
+                        content = event.get("content", "Thinking...")
+                        show_status(Panel(f"🤔 {content}", title="AIDEN Status", style="yellow"))
+                        return False
+                    
+                    async def on_tool_start(event: Dict[str, Any]) -> bool:
+                        tool_name = event.get("name", "Unknown")
+                        tool_input = event.get("input", "")
+                        show_status(Panel(
+                            f"🔧 Using: {tool_name}\nInput: {tool_input[:100]}{'...' if len(tool_input) > 100 else ''}",
+                            title="Tool Execution",
+                            style="blue"
+                        ))
+                        return False
+                    
+                    async def on_tool_end(event: Dict[str, Any]) -> bool:
+                        tool_name = event.get("name", "Unknown")
+                        result = event.get("result", "")
+                        show_status(Panel(
+                            f"✅ Completed: {tool_name}\nResult: {result[:200]}{'...' if len(result) > 200 else ''}",
+                            title="Tool Result",
+                            style="green"
+                        ))
+                        await asyncio.sleep(1)  # Show result briefly
+                        return False
+                    
+                    async def on_llm_chunk(event: Dict[str, Any]) -> bool:
+                        nonlocal dirty, showing_response
+                        response_chunks.append(event.get("content", ""))
+                        if showing_response:
+                            dirty = True  # Redrawn by refresh_response on the next tick
+                        else:
+                            # Show the first chunk right away so batching never delays it
+                            showing_response = True
+                            draw_response()
+                        return False
+                    
+                    async def on_final_response(event: Dict[str, Any]) -> bool:
+                        nonlocal response_text
+                        response_text = event.get("content") or "".join(response_chunks)
                         
-                        elif event_type == "error":
-                            error_detail = event.get("detail", "Unknown error")
-                            error_panel = Panel(
-                                f"❌ Error: {error_detail}",
-                                title="Error",
-                                style="red"
-                            )
-                            live.update(error_panel)
-                            break
+                        # Final response without cursor
+                        response_body.plain = response_text
+                        live.update(response_panel, refresh=True)
+                        return True
+                    
+                    async def on_error(event: Dict[str, Any]) -> bool:
+                        error_detail = event.get("detail", "Unknown error")
+                        live.update(Panel(
+                            f"❌ Error: {error_detail}",
+                            title="Error",
+                            style="red"
+                        ), refresh=True)
+                        return True
+                    
+                    # Event type -> handler; a handler returns True when the stream is finished
+                    handlers = {
+                        "thinking_indicator": on_thinking,
+                        "tool_start": on_tool_start,
+                        "tool_end": on_tool_end,
+                        "llm_chunk": on_llm_chunk,
+                        "final_response": on_final_response,
+                        "error": on_error,
+                    }
+                    
+                    refresher = asyncio.create_task(refresh_response())
+                    try:
+                        async for event in self.stream_chat_response(user_input):
+                            handler = handlers.get(event.get("type"))
+                            if handler is not None and await handler(event):
+                                break
+                    finally:
+                        refresher.cancel()
+                
+                if not response_text:
+                    response_text = "".join(response_chunks)
                 
                 # Update conversation history
-                if response_text and self.conversation_history:
-                    self.conversation_history[-1]["agent"] = response_text
+                if response_text:
+                    turn["agent"] = response_text
+                self._journal_turn(turn)
                 
             except KeyboardInterrupt:
                 self.console.print("\n\n👋 Chat interrupted. Returning to menu...", style="yellow")
@@ -696,7 +925,22 @@ Whisper: {voice_config.get('whisper_model', 'Not configured')}""",
             except Exception as e:
                 self.console.print(f"\n❌ Error: {e}", style="red")
 
-    def export_logs(self):
+    def _journal_turn(self, turn: Dict[str, Any]):
+        """Append a completed turn to this session's JSONL journal, a private temporary file removed on exit"""
+        if self._journal_file is None:
+            fd, path = tempfile.mkstemp(prefix="aiden_chat_", suffix=".jsonl")
+            self._journal_path = Path(path)
+            self._journal_file = os.fdopen(fd, "ab", buffering=1 << 20)
+        self._journal_file.write(_dumps(turn, indent=False) + b"\n")
+
+    def _read_journal(self) -> List[Dict[str, Any]]:
+        """Return every turn of the session, including ones evicted from memory"""
+        if self._journal_file is None:
+            return list(self.conversation_history)
+        self._journal_file.flush()
+        return [_loads(line) for line in self._journal_path.read_bytes().splitlines() if line]
+
+    async def export_logs(self):
         """Export conversation logs"""
         self.clear_screen()
         self.show_header()
@@ -706,57 +950,44 @@ Whisper: {voice_config.get('whisper_model', 'Not configured')}""",
         
         if not self.conversation_history:
             self.console.print("No conversation history to export.", style="yellow")
-            input("Press Enter to continue...")
+            await self._pause()
             return
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"aiden_chat_{timestamp}.json"
+        now = datetime.now()
+        filename = f"aiden_chat_{now:%Y%m%d_%H%M%S}.json"
         
         try:
-            with open(filename, 'w') as f:
-                json.dump({
-                    "exported_at": datetime.now().isoformat(),
-                    "session_id": self.session_id,
-                    "conversation_count": len(self.conversation_history),
-                    "conversation": self.conversation_history
-                }, f, indent=2)
+            conversation = self._read_journal()
+            payload = _dumps({
+                "exported_at": now.isoformat(),
+                "session_id": self.session_id,
+                "conversation_count": len(conversation),
+                "conversation": conversation
+            })
+            # Serialized up front so the file gets one large write and is never left half-written
+            with open(filename, 'wb') as f:
+                f.write(payload)
             
             self.console.print(f"✅ Logs exported to: {filename}", style="green")
-            self.console.print(f"   {len(self.conversation_history)} conversation entries saved", style="dim")
+            self.console.print(f"   {len(conversation)} conversation entries saved", style="dim")
         except Exception as e:
             self.console.print(f"❌ Export failed: {e}", style="red")
         
-        input("Press Enter to continue...")
+        await self._pause()
 
     def show_main_menu(self):
         """Display the enhanced main menu"""
         self.clear_screen()
         self.show_header()
         
-        menu_panel = Panel(
-            """[bold cyan]AIDEN V2 Main Menu[/bold cyan]
-
-[1] ⚙️  Configure AIDEN (API Keys & Voice Setup)
-[2] 🧪 Test System (Backend, Chat, Voice)
-[3] 💬 Start Text Chat (Streaming conversation)
-[4] 🎤 Start Voice Mode (Real-time voice chat)
-[5] 📁 Export Logs (Save conversation history)
-[6] 📊 System Status (Detailed status view)
-[7] 🚪 Exit
-
-Choose an option (1-7):""",
-            style="bright_blue",
-            padding=(1, 2)
-        )
-        
-        self.console.print(menu_panel)
+        self.console.print(self._main_menu_panel)
 
     async def run(self):
         """Enhanced main application loop"""
         while True:
             try:
                 self.show_main_menu()
-                choice = Prompt.ask("Choice", choices=["1", "2", "3", "4", "5", "6", "7"], default="3")
+                choice = Prompt.ask("Choice", choices=MAIN_MENU_CHOICES, default="3")
                 
                 if choice == "1":
                     await self.show_config_menu()
@@ -767,7 +998,7 @@ Choose an option (1-7):""",
                 elif choice == "4":
                     await self.start_voice_mode()
                 elif choice == "5":
-                    self.export_logs()
+                    await self.export_logs()
                 elif choice == "6":
                     await self.show_detailed_status()
                 elif choice == "7":
@@ -779,28 +1010,25 @@ Choose an option (1-7):""",
                 break
             except Exception as e:
                 self.console.print(f"\n❌ Error: {e}", style="red")
-                input("Press Enter to continue...")
+                await self._pause()
 
 async def main():
-    """Enhanced entry point with dependency checking"""
+    """Enhanced entry point"""
     try:
-        # Install required packages if missing
-        try:
-            import rich
-            import httpx
-        except ImportError:
-            print("📦 Installing required packages...")
-            import subprocess
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "rich", "httpx"])
-            print("✅ Packages installed!")
-        
         print("🚀 Starting AIDEN V2 CLI...")
-        app = AidenCLI()
-        await app.run()
+        async with AidenCLI() as app:
+            await app.run()
         
     except Exception as e:
         print(f"💥 Fatal error: {e}")
         sys.exit(1)
 
 if __name__ == "__main__":
+    # uvloop is optional; only the CLI entry point switches the loop policy
+    if settings.USE_UVLOOP:
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            pass
     asyncio.run(main()) 
\ No newline at end of file
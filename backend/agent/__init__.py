@@ -12,6 +12,8 @@ from .agent_factory import (
     create_simple_agent,
     get_agent_instance,
     initialize_global_agent,
+    is_agent_instantiated,
+    reload_tools,
     current_agent # Export for direct access if needed, though get_agent_instance is preferred
 )
 
@@ -19,9 +21,11 @@ __all__ = [
     "StreamingAgent",
     "create_gemini_model",
     "load_all_tools",
+    "reload_tools",
     "create_main_agent",
     "create_simple_agent",
     "get_agent_instance",
     "initialize_global_agent",
+    "is_agent_instantiated",
     "current_agent"
 ] 
\ No newline at end of file
@@ -3,13 +3,16 @@ Agent Factory for AIDEN V2
 
 Provides functions to create different configurations of AIDEN agents.
 """
+import functools
 import logging
-from typing import Optional, List
+import threading
+from typing import Optional, List, Any
 
 from agno.tools.duckduckgo import DuckDuckGoTools # Standard web search tool
 
 from backend.config import settings
 from backend.agent.base_agent import StreamingAgent, create_gemini_model
+from backend.agent import tool_loader
 from backend.agent.tool_loader import load_all_tools # Updated import
 from backend.models.openrouter import OpenRouterModel
 # Import other specialized agents or teams here as they are developed
@@ -18,7 +21,8 @@ from backend.models.openrouter import OpenRouterModel
 
 logger = logging.getLogger(__name__)
 
-DEFAULT_INSTRUCTIONS = [
+# Instruction sets are immutable; each agent gets its own list copy so nothing can mutate the shared defaults
+DEFAULT_INSTRUCTIONS = (
     "You are AIDEN, a highly capable AI personal assistant powered by Llama 4 Maverick (via OpenRouter).",
     "You leverage the latest multimodal AI capabilities to assist users with a wide range of tasks.",
     "Be proactive, thoughtful, and clear in your responses with minimal latency.",
@@ -26,48 +30,114 @@ DEFAULT_INSTRUCTIONS = [
     "Provide answers in Markdown format when it enhances readability (e.g., for lists, code blocks).",
     "If you encounter an error with a tool, acknowledge it and try to answer based on your existing knowledge or suggest an alternative.",
     "Maintain a conversational and helpful tone, optimized for both text and voice interactions."
-]
+)
+
+SIMPLE_INSTRUCTIONS = (
+    "You are AIDEN, a helpful AI assistant (basic mode).",
+    "Provide concise and accurate responses based on your training data.",
+    "Tool usage is currently limited in this mode."
+)
+
+@functools.lru_cache(maxsize=1)
+def _shared_duckduckgo() -> DuckDuckGoTools:
+    """Single DuckDuckGoTools instance reused by every agent."""
+    return DuckDuckGoTools()
+
+@functools.lru_cache(maxsize=1)
+def _main_agent_tools() -> tuple:
+    """
+    The main agent's tool set, resolved once: every loaded tool plus web search when enabled.
+    """
+    # Load all tools (both pre-configured and custom)
+    tools = load_all_tools()
+    
+    # Always include DuckDuckGoTools if web search is enabled and not already included
+    if settings.ENABLE_WEB_SEARCH:
+        if not any(isinstance(tool, DuckDuckGoTools) for tool in tools):
+            tools.append(_shared_duckduckgo())
+            logger.info("Added DuckDuckGoTools for web search.")
+        else:
+            logger.info("DuckDuckGoTools already present in tools.")
+    return tuple(tools)
+
+def reload_tools() -> None:
+    """
+    Drop every cached tool set so the next agent build rescans backend/tools.
+    Agents that were already built keep the tools they were created with.
+    """
+    tool_loader.reload_tools()
+    _main_agent_tools.cache_clear()
+
+def _create_openrouter_model():
+    """OpenRouter (Llama 4 Maverick) model, or None when OpenRouter isn't enabled and configured."""
+    if not (settings.USE_OPENROUTER and settings.is_openrouter_valid):
+        return None
+    logger.info("Creating OpenRouter model: %s", settings.OPENROUTER_MODEL_ID)
+    return OpenRouterModel(
+        id=settings.OPENROUTER_MODEL_ID,
+        api_key=settings.OPENROUTER_API_KEY,
+        temperature=settings.MODEL_TEMPERATURE,
+        max_tokens=4000,  # Reasonable response length
+    )
+
+def _create_gemini_fallback_model():
+    """Gemini model, or None when no valid Google API key is configured."""
+    if not settings.is_google_api_key_valid:
+        return None
+    logger.info("Creating Gemini model: %s", settings.GEMINI_MODEL_ID)
+    return create_gemini_model()
+
+# Provider name (as used in MODEL_FALLBACK_CHAIN) -> model factory
+_MODEL_FACTORIES = {
+    "openrouter": _create_openrouter_model,
+    "gemini": _create_gemini_fallback_model,
+}
+# Provider name -> settings attribute holding its model id, for logging the chain
+_MODEL_ID_SETTINGS = {
+    "openrouter": "OPENROUTER_MODEL_ID",
+    "gemini": "GEMINI_MODEL_ID",
+}
+
+def _describe_model_chain() -> str:
+    """MODEL_FALLBACK_CHAIN in the order create_model() tries it, with each provider's model id."""
+    steps = []
+    for provider in settings.MODEL_FALLBACK_CHAIN:
+        if provider not in _MODEL_FACTORIES:
+            steps.append(f"{provider} (unknown, skipped)")
+        else:
+            steps.append(f"{provider} ({getattr(settings, _MODEL_ID_SETTINGS[provider])})")
+    return " -> ".join(steps) or "(empty)"
 
 def create_model():
     """
     Create the best available model based on configuration.
-    Prioritizes OpenRouter with Llama 4 Maverick, falls back to Gemini.
+    Providers are tried once each, in MODEL_FALLBACK_CHAIN order (default: OpenRouter, then Gemini);
+    unconfigured providers are skipped and a failing one hands over to the next.
     """
     logger.info("Selecting optimal model based on configuration...")
     
-    model_type = settings.preferred_model_type
-    
-    if model_type == "openrouter":
-        try:
-            logger.info(f"Creating OpenRouter model: {settings.OPENROUTER_MODEL_ID}")
-            model = OpenRouterModel(
-                id=settings.OPENROUTER_MODEL_ID,
-                api_key=settings.OPENROUTER_API_KEY,
-                temperature=0.7,  # Balanced creativity and consistency
-                max_tokens=4000,  # Reasonable response length
-            )
-            logger.info("✅ OpenRouter model created successfully")
-            return model
-        except Exception as e:
-            logger.error(f"Failed to create OpenRouter model: {e}")
-            logger.info("Falling back to Gemini model...")
-    
-    # Fallback to Gemini
-    if model_type == "gemini" or model_type == "none":
+    last_error: Optional[Exception] = None
+    for provider in settings.MODEL_FALLBACK_CHAIN:
+        factory = _MODEL_FACTORIES.get(provider)
+        if factory is None:
+            logger.warning("Unknown model provider '%s' in MODEL_FALLBACK_CHAIN; skipping.", provider)
+            continue
         try:
-            if settings.is_google_api_key_valid:
-                logger.info("Creating Gemini fallback model")
-                model = create_gemini_model()
-                logger.info("✅ Gemini model created successfully")
-                return model
-            else:
-                logger.error("No valid API keys available for any model")
-                raise ValueError("No valid model configuration found. Please set OPENROUTER_API_KEY or GOOGLE_API_KEY")
+            model = factory()
         except Exception as e:
-            logger.error(f"Failed to create Gemini model: {e}")
-            raise
+            logger.error("Failed to create %s model: %s", provider, e)
+            last_error = e
+            continue
+        if model is None:
+            logger.debug("Model provider '%s' is not configured; skipping.", provider)
+            continue
+        logger.info("✅ %s model created successfully", provider)
+        return model
     
-    raise ValueError("Unable to create any model")
+    if last_error is not None:
+        raise ValueError(f"Unable to create any model (last error: {last_error})") from last_error
+    logger.error("No valid API keys available for any model")
+    raise ValueError("No valid model configuration found. Please set OPENROUTER_API_KEY or GOOGLE_API_KEY")
 
 def create_main_agent(instructions: Optional[List[str]] = None) -> StreamingAgent:
     """
@@ -75,24 +145,16 @@ def create_main_agent(instructions: Optional[List[str]] = None) -> StreamingAgen
     This will be the primary agent used for most interactions.
     """
     logger.info("Creating main AIDEN agent with optimized model selection...")
+    model = None
     try:
         model = create_model()
         
-        # Load all tools (both pre-configured and custom)
-        tools = load_all_tools()
-        
-        # Always include DuckDuckGoTools if web search is enabled and not already included
-        if settings.ENABLE_WEB_SEARCH:
-            if not any(isinstance(tool, DuckDuckGoTools) for tool in tools):
-                tools.append(DuckDuckGoTools())
-                logger.info("Added DuckDuckGoTools for web search.")
-            else:
-                logger.info("DuckDuckGoTools already present in tools.")
+        tools = list(_main_agent_tools())
         
         # TODO: In the future, specialized agents (FileAgent, CodeAgent) might be composed here
         # or this agent might become part of a larger Agno Team.
 
-        final_instructions = instructions if instructions else DEFAULT_INSTRUCTIONS
+        final_instructions = list(instructions or DEFAULT_INSTRUCTIONS)
 
         agent = StreamingAgent(
             model=model,
@@ -108,41 +170,36 @@ def create_main_agent(instructions: Optional[List[str]] = None) -> StreamingAgen
         if hasattr(model, 'id'):
             model_info += f" ({model.id})"
         
-        logger.info(f"✅ Main AIDEN agent created successfully with {len(tools)} tools using {model_info}")
+        logger.info("✅ Main AIDEN agent created successfully with %d tools using %s", len(tools), model_info)
         return agent
     except Exception as e:
-        logger.error(f"Failed to create main AIDEN agent: {e}", exc_info=True)
+        logger.error("Failed to create main AIDEN agent: %s", e, exc_info=True)
         # Fallback to a simple agent in case of catastrophic failure during main agent creation
         logger.warning("Falling back to a simple agent due to an error in main agent creation.")
-        return create_simple_agent(instructions=instructions, error_context=str(e))
+        # A model that was already built is handed over rather than constructed a second time
+        return create_simple_agent(instructions=instructions, error_context=str(e), model=model)
 
-def create_simple_agent(instructions: Optional[List[str]] = None, error_context: Optional[str] = None) -> StreamingAgent:
+def create_simple_agent(
+    instructions: Optional[List[str]] = None,
+    error_context: Optional[str] = None,
+    model: Optional[Any] = None
+) -> StreamingAgent:
     """
     Creates a basic AIDEN agent without dynamic tools or web search.
     Useful for testing, fallback, or specific simple tasks.
+    Pass `model` to reuse an existing model instance instead of creating one.
     """
     logger.info("Creating simple AIDEN agent...")
     if error_context:
-        logger.warning(f"Simple agent is being created due to a previous error: {error_context}")
+        logger.warning("Simple agent is being created due to a previous error: %s", error_context)
 
     try:
-        # Try to create the best available model first
-        try:
+        # Same MODEL_FALLBACK_CHAIN as the main agent; it already falls through every configured provider
+        if model is None:
             model = create_model()
-        except Exception as model_error:
-            logger.error(f"Failed to create optimal model for simple agent: {model_error}")
-            # Ultimate fallback to Gemini if available
-            if settings.is_google_api_key_valid:
-                logger.info("Using Gemini as ultimate fallback")
-                model = create_gemini_model()
-            else:
-                raise ValueError("No working model available")
         
-        simple_instructions = instructions if instructions else [
-            "You are AIDEN, a helpful AI assistant (basic mode).",
-            "Provide concise and accurate responses based on your training data.",
-            "Tool usage is currently limited in this mode."
-        ]
+        # Copied so the error note below never lands in the caller's list
+        simple_instructions = list(instructions or SIMPLE_INSTRUCTIONS)
         if error_context:
             simple_instructions.append(f"Note: Advanced features may be temporarily unavailable due to: {error_context}")
 
@@ -157,7 +214,7 @@ def create_simple_agent(instructions: Optional[List[str]] = None, error_context:
         logger.info("✅ Simple AIDEN agent created successfully.")
         return agent
     except Exception as e:
-        logger.critical(f"FATAL: Failed to create even the simple AIDEN agent: {e}", exc_info=True)
+        logger.critical("FATAL: Failed to create even the simple AIDEN agent: %s", e, exc_info=True)
         # If even the simple agent fails, we might need to raise the exception
         # or return a dummy agent that only says it's offline.
         raise  # Re-raise the exception as this is critical
@@ -166,53 +223,59 @@ def create_simple_agent(instructions: Optional[List[str]] = None, error_context:
 # Global agent instance, to be initialized by the application (e.g., FastAPI startup)
 # This allows the application to decide when and how to initialize the agent.
 current_agent: Optional[StreamingAgent] = None
+# Agent type recorded by initialize_global_agent; the agent itself is built on first use
+_agent_type: Optional[str] = None
+_agent_lock = threading.Lock()
+
+def is_agent_instantiated() -> bool:
+    """True once the global agent has actually been built (cheap check for health endpoints)."""
+    return current_agent is not None
 
 def get_agent_instance() -> StreamingAgent:
     """
-    Returns the globally managed agent instance.
-    Raises an error if the agent has not been initialized.
+    Returns the globally managed agent instance, building it on first access.
+    Raises an error if the agent has not been initialized or cannot be created.
     """
-    if current_agent is None:
+    global current_agent
+    if current_agent is not None:
+        return current_agent
+    if _agent_type is None:
         logger.error("Agent instance requested before initialization.")
         raise RuntimeError("AIDEN agent has not been initialized. The application may not have started correctly.")
+    
+    with _agent_lock:
+        # Another thread may have finished building it while we waited for the lock
+        if current_agent is None:
+            logger.info("Creating global AIDEN agent (type: %s) on first use...", _agent_type)
+            try:
+                if _agent_type == "simple":
+                    current_agent = create_simple_agent()
+                else:
+                    current_agent = create_main_agent()
+            except Exception as e:
+                # Not cached: the next request retries the build
+                raise RuntimeError(f"AIDEN agent could not be created: {e}") from e
+            logger.info("✅ Global AIDEN agent (type: %s) initialized successfully.", _agent_type)
     return current_agent
 
 def initialize_global_agent(agent_type: str = "main"):
     """
-    Initializes the global agent instance.
-    Called at application startup.
+    Registers which global agent to use. Called at application startup.
+    The agent (model client, tools) is created lazily by the first get_agent_instance() call,
+    so startup and requests that never touch the agent don't pay for it.
     Args:
         agent_type: "main" or "simple".
     """
-    global current_agent
-    logger.info(f"Initializing global AIDEN agent (type: {agent_type})...")
+    global _agent_type
+    logger.info("Initializing global AIDEN agent (type: %s)...", agent_type)
     
     # Log configuration info
-    model_type = settings.preferred_model_type
-    logger.info(f"Model preference: {model_type}")
-    if model_type == "openrouter":
-        logger.info(f"OpenRouter model: {settings.OPENROUTER_MODEL_ID}")
-    elif model_type == "gemini":
-        logger.info(f"Gemini model: {settings.GEMINI_MODEL_ID}")
+    logger.info("Model fallback chain: %s", _describe_model_chain())
     
-    if agent_type == "main":
-        current_agent = create_main_agent()
-    elif agent_type == "simple":
-        current_agent = create_simple_agent()
-    else:
-        logger.warning(f"Unknown agent type '{agent_type}'. Defaulting to main agent.")
-        current_agent = create_main_agent()
-    
-    if current_agent:
-        logger.info(f"✅ Global AIDEN agent (type: {agent_type}) initialized successfully.")
-    else:
-        # This case should ideally be handled by exceptions in create_xxx_agent
-        logger.error(f"Failed to initialize global AIDEN agent (type: {agent_type}). Using a dummy fallback.")
-        # Create a dummy non-functional agent or raise critical error
-        # For now, let's assume create_simple_agent handles its own critical failures by raising
-        # If create_main_agent falls back, it calls simple, which might raise.
-        # This path implies even simple agent creation failed AND didn't raise, which is unlikely.
-        pass # Or raise a specific error for the application to handle
+    if agent_type not in ("main", "simple"):
+        logger.warning("Unknown agent type '%s'. Defaulting to main agent.", agent_type)
+        agent_type = "main"
+    _agent_type = agent_type
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.DEBUG)
@@ -6,26 +6,243 @@ Contains the StreamingAgent class and Gemini model creation utilities.
 import logging
 import json
 import asyncio
-from typing import Optional, AsyncGenerator, Dict, Any, List
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
+from itertools import islice
+from typing import Optional, AsyncGenerator, Dict, Any, Iterator, List, Tuple
 import os
 
 from agno.agent import Agent
 from agno.models.google import Gemini
 
-from backend.config import settings as global_settings # Renamed to avoid conflict
+from backend.config import settings as global_settings, is_valid_google_api_key # Renamed to avoid conflict
+from backend.core.semantic_cache import semantic_cache
+
+def _json_preview_stdlib(obj: Any, limit: int) -> str:
+    """JSON-encode obj, truncated to about limit characters with a trailing '...'."""
+    serialized = json.dumps(obj, default=str)
+    return serialized[:limit] + "..." if len(serialized) > limit else serialized
+
+try:
+    import orjson
+
+    def _json_preview(obj: Any, limit: int) -> str:
+        """JSON-encode obj, truncated to about limit characters with a trailing '...'."""
+        try:
+            # datetime/UUID/dataclass values are encoded natively; default=str only sees the rest
+            raw = orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson.JSONEncodeError (a TypeError) covers what json accepts but orjson doesn't,
+            # such as ints wider than 64 bits; a preview must never end the streamed reply
+            return _json_preview_stdlib(obj, limit)
+        if len(raw) > limit:
+            # Slice the bytes before decoding; a multi-byte character cut at the edge is dropped
+            return raw[:limit].decode("utf-8", "ignore") + "..."
+        return raw.decode()
+except ImportError:
+    _json_preview = _json_preview_stdlib
 
 logger = logging.getLogger(__name__)
 
+# Imported and configured once here rather than on every streamed turn
+try:
+    import google.generativeai as genai
+
+    if global_settings.GOOGLE_API_KEY:
+        genai.configure(api_key=global_settings.GOOGLE_API_KEY)
+except ImportError:
+    genai = None
+
+@lru_cache(maxsize=4)
+def _genai_model(model_id: str) -> Any:
+    """One reusable google.generativeai model per model id."""
+    return genai.GenerativeModel(model_id)
+
+# Longest tool result echoed back to the client in a tool_end event
+TOOL_RESULT_PREVIEW_CHARS = 1000
+# Longest web search query sent to the search tool
+MAX_SEARCH_QUERY_CHARS = 400
+# Queries up to this long are sent verbatim; longer prompts are narrowed to one sentence first
+SHORT_SEARCH_QUERY_CHARS = 120
+
+# Phrases that suggest a prompt needs fresh information from the web
+SEARCH_KEYWORDS = (
+    "latest news", "current events", "what is the weather", "define", "who is",
+    "what is", "how to", "search for", "find information on", "stock price",
+    "recent updates", "statistics for", "release date"
+)
+# One case-insensitive alternation scans the prompt once, without a lowercased copy
+_SEARCH_KEYWORD_PATTERN = re.compile("|".join(map(re.escape, SEARCH_KEYWORDS)), re.IGNORECASE)
+
+# Answers to these depend on when they are asked, so they are never reused from the semantic cache
+_TIME_SENSITIVE_PATTERN = re.compile(
+    r"\b(?:today|tonight|tomorrow|yesterday|now|currently|latest|recent|this (?:week|month|year))\b",
+    re.IGNORECASE,
+)
+
+# A sentence with its terminating punctuation, for narrowing long prompts to a search query
+# (punctuation directly followed by a non-space, as in "3.12" or "node.js", does not end a sentence)
+_SENTENCE_PATTERN = re.compile(r"(?:[^.?!\n]|[.?!](?=\S))+[.?!]*")
+
+# Whitespace-separated words; counted lazily so only the first few are ever matched
+_WORD_PATTERN = re.compile(r"\S+")
+# Up to eight words with their trailing whitespace, for paced (simulated) streaming
+_SIMULATED_CHUNK_PATTERN = re.compile(r"\s*(?:\S+\s*){1,8}")
+
+# Prompts at least this long (pasted documents, transcripts) are scanned with Hyperscan when available
+HYPERSCAN_MIN_PROMPT_CHARS = 8192
+try:
+    import hyperscan
+
+    _SEARCH_KEYWORD_DB = hyperscan.Database()
+    _SEARCH_KEYWORD_DB.compile(
+        expressions=[keyword.encode() for keyword in SEARCH_KEYWORDS],
+        ids=list(range(len(SEARCH_KEYWORDS))),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(SEARCH_KEYWORDS),
+    )
+    _HYPERSCAN_SCAN_TERMINATED = getattr(hyperscan, "ScanTerminated", ())
+except ImportError:
+    _SEARCH_KEYWORD_DB = None
+
+def _contains_search_keyword(prompt: str) -> bool:
+    if _SEARCH_KEYWORD_DB is not None and len(prompt) >= HYPERSCAN_MIN_PROMPT_CHARS:
+        matches = []
+
+        def on_match(match_id: int, *_: Any) -> bool:
+            matches.append(match_id)
+            return True  # One keyword is enough; a truthy return halts the scan
+
+        # Only called from the event loop thread, so the database's own scratch space is safe to reuse
+        try:
+            _SEARCH_KEYWORD_DB.scan(prompt.encode("utf-8", "replace"), match_event_handler=on_match)
+        except _HYPERSCAN_SCAN_TERMINATED:
+            pass  # Some python-hyperscan versions report the halted scan as an exception
+        return bool(matches)
+    return _SEARCH_KEYWORD_PATTERN.search(prompt) is not None
+
+# routes.py prepends history as "<history>\n\nUser: <message>"; the current message follows the last marker
+_USER_TURN_MARKER = "\nUser: "
+
+def _current_user_message(prompt: str) -> str:
+    """The current user message of a prompt that may have conversation history prepended."""
+    _, marker, message = prompt.rpartition(_USER_TURN_MARKER)
+    return message.strip() if marker else prompt.strip()
+
+def _semantic_cache_scope(prompt: str, session_id: str) -> str:
+    """
+    Semantic cache scope for a prompt: the session plus the exact history prepended to it.
+    A follow-up such as "tell me more" only reuses an answer given after the same history.
+    """
+    history, marker, _ = prompt.rpartition(_USER_TURN_MARKER)
+    return f"{session_id}\n{history if marker else ''}"
+
+_SEARCH_RESULT_TEMPLATE = "{0}. Title: {1}\n   Snippet: {2}...\n   Source: {3}\n"
+
+@lru_cache(maxsize=64)
+def _format_search_results(results: Tuple[Tuple[str, str, str], ...]) -> str:
+    """Formats (title, snippet, url) search hits; repeat queries served from the search cache reuse the text."""
+    return "".join(_SEARCH_RESULT_TEMPLATE.format(i, *result) for i, result in enumerate(results, 1))
+
+_STREAM_DONE = object()
+# Model streams are drained on their own pool: a few long SSE streams can't take over the default
+# executor that asyncio.to_thread shares with agent runs, searches, memory and voice
+_STREAM_EXECUTOR = ThreadPoolExecutor(max_workers=global_settings.STREAM_WORKER_THREADS, thread_name_prefix="aiden-stream")
+
+async def _stream_batches(iterator: Iterator[str], batcher: "_ChunkBatcher") -> AsyncGenerator[str, None]:
+    """
+    Drains a blocking iterator on a stream worker thread and yields the batcher's batches.
+    While text is buffered the next read is only awaited until the batch is due, so a pause
+    in the model can't hold buffered text back. The tail is left in the batcher for the caller.
+    """
+    loop = asyncio.get_running_loop()
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = loop.run_in_executor(_STREAM_EXECUTOR, next, iterator, _STREAM_DONE)
+            time_left = batcher.time_left()
+            if time_left is not None:
+                # asyncio.wait leaves the read running on timeout; it is picked up on the next pass
+                done, _ = await asyncio.wait((pending,), timeout=time_left)
+                if not done:
+                    yield batcher.flush()
+                    continue
+            item = await pending
+            pending = None
+            if item is _STREAM_DONE:
+                return
+            batch = batcher.add(item)
+            if batch:
+                yield batch
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+class _ChunkBatcher:
+    """Coalesces adjacent model text chunks so fewer, larger llm_chunk events are emitted."""
+
+    __slots__ = ("max_chars", "max_delay", "_parts", "_size", "_started")
+
+    def __init__(self, max_chars: int = global_settings.STREAM_COALESCE_CHARS,
+                 max_delay: float = global_settings.STREAM_COALESCE_DELAY_MS / 1000):
+        self.max_chars = max_chars
+        self.max_delay = max_delay
+        self._parts: List[str] = []
+        self._size = 0
+        self._started = 0.0
+
+    def add(self, text: str) -> Optional[str]:
+        """Buffer a chunk; returns the joined batch once it is large or old enough."""
+        if not self._parts:
+            self._started = time.monotonic()
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.max_chars or time.monotonic() - self._started >= self.max_delay:
+            return self.flush()
+        return None
+
+    def time_left(self) -> Optional[float]:
+        """Seconds until the buffered batch is due (0 if overdue), or None when nothing is buffered."""
+        if not self._parts:
+            return None
+        return max(self._started + self.max_delay - time.monotonic(), 0.0)
+
+    def flush(self) -> Optional[str]:
+        """Return whatever is buffered (None if empty) and reset."""
+        if not self._parts:
+            return None
+        text = "".join(self._parts)
+        self._parts.clear()
+        self._size = 0
+        return text
+
+
 class StreamingAgent(Agent):
     """Extended Agno Agent class with streaming capabilities for AIDEN."""
 
-    async def stream_run(self, prompt: str, session_id: str = "default") -> AsyncGenerator[Dict[str, Any], None]:
+    # Web search results shared by every agent instance: (tool class, tool name, normalized query) -> (fetched_at, results)
+    _search_cache: "OrderedDict[Tuple[str, str, str], Tuple[float, Any]]" = OrderedDict()
+    _search_cache_hits = 0
+    _search_cache_misses = 0
+
+    # Streaming approaches in probe order; each is a method yielding text chunks for a prompt
+    _STREAM_STRATEGIES = ("_stream_via_model_client", "_stream_via_genai", "_stream_via_generate_stream")
+    # The approach that last streamed successfully, set per instance on first success
+    _stream_strategy: Optional[str] = None
+
+    async def stream_run(self, prompt: str, session_id: str = "default",
+                         user_message: Optional[str] = None) -> AsyncGenerator[Dict[str, Any], None]:
         """
         Stream the execution of the agent, yielding events for tool usage and responses.
         
         Args:
-            prompt: User prompt to process.
+            prompt: User prompt to process, possibly with conversation history prepended.
             session_id: Identifier for the current session (for memory, logging, etc.).
+            user_message: The current user message alone. Web search decisions are based on it,
+                not on older turns in the history; derived from prompt when not given.
             
         Yields:
             Event dictionaries with types:
@@ -36,34 +253,70 @@ class StreamingAgent(Agent):
             - error: If an error occurs
             - thinking_indicator: Signals agent is processing
         """
-        logger.info(f"[Session: {session_id}] Starting streaming agent run for prompt: '{prompt[:50]}...'")
+        logger.info("[Session: %s] Starting streaming agent run for prompt: '%s...'", session_id, prompt[:50])
         
         try:
             yield {"type": "thinking_indicator", "content": "Analyzing request..."}
 
+            if user_message is None:
+                user_message = _current_user_message(prompt)
+            needs_search = bool(self.tools) and global_settings.ENABLE_WEB_SEARCH and self._needs_web_search(user_message)
+
+            # Keyed on the current message, scoped to this session and its history. Only deterministic
+            # (temperature 0) models are cached, and answers to time-sensitive (search-worthy)
+            # messages are never served from or stored in the semantic cache
+            prompt_vector = None
+            cache_scope = _semantic_cache_scope(prompt, session_id)
+            if (semantic_cache is not None and getattr(self.model, "temperature", None) == 0
+                    and not needs_search and not _TIME_SENSITIVE_PATTERN.search(user_message)):
+                prompt_vector = await semantic_cache.embed(user_message)
+                cached_response = semantic_cache.lookup(prompt_vector, cache_scope) if prompt_vector is not None else None
+                if cached_response is not None:
+                    logger.info("[Session: %s] Semantic cache hit", session_id)
+                    yield {"type": "llm_chunk", "content": cached_response}
+                    yield {"type": "final_response", "content": cached_response, "cached": "semantic"}
+                    return
+
             search_performed_results = None
-            if self.tools and global_settings.ENABLE_WEB_SEARCH and await self._needs_web_search(prompt):
+            if needs_search:
                 yield {"type": "thinking_indicator", "content": "Searching the web..."}
-                web_search_tool = next((t for t in self.tools if hasattr(t, 'search') and t.__class__.__name__ == "DuckDuckGoTools"), None)
+                web_search_tools = self._web_search_tools
                 
-                if web_search_tool:
-                    search_query = self._extract_search_query(prompt)
-                    tool_name = web_search_tool.__class__.__name__
+                if web_search_tools:
+                    # From the current message only; older turns in the history would make a stale query
+                    search_query = self._extract_search_query(user_message)
+                    for tool in web_search_tools:
+                        yield {"type": "tool_start", "name": tool.__class__.__name__, "input": search_query}
                     
-                    yield {"type": "tool_start", "name": tool_name, "input": search_query}
-                    try:
-                        search_results = web_search_tool.search(search_query)
-                        search_performed_results = search_results
+                    # Every search tool is queried concurrently, so the wait is one round-trip
+                    outcomes = await asyncio.gather(
+                        *(self._cached_search(tool, search_query) for tool in web_search_tools),
+                        return_exceptions=True
+                    )
+                    for tool, outcome in zip(web_search_tools, outcomes):
+                        tool_name = tool.__class__.__name__
+                        if isinstance(outcome, asyncio.TimeoutError):
+                            # A slow search shouldn't hold up the answer; generate without its results
+                            logger.warning("[Session: %s] Web search with %s timed out after %ss", session_id, tool_name, global_settings.WEB_SEARCH_TIMEOUT)
+                            yield {"type": "tool_end", "name": tool_name, "result": "[]", "cached": False, "timed_out": True}
+                            continue
+                        if isinstance(outcome, Exception):
+                            logger.error("[Session: %s] Web search with %s failed: %s", session_id, tool_name, outcome, exc_info=outcome)
+                            yield {"type": "error", "name": tool_name, "detail": str(outcome)}
+                            continue
+                        search_results, cached = outcome
+                        if search_performed_results is None:
+                            search_performed_results = search_results
+                        elif isinstance(search_performed_results, list) and isinstance(search_results, list):
+                            search_performed_results = search_performed_results + search_results
                         yield {
                             "type": "tool_end", 
                             "name": tool_name, 
-                            "result": json.dumps(search_results, default=str)[:1000]
+                            "result": _json_preview(search_results, TOOL_RESULT_PREVIEW_CHARS),
+                            "cached": cached
                         }
-                    except Exception as e:
-                        logger.error(f"[Session: {session_id}] Web search with {tool_name} failed: {e}", exc_info=True)
-                        yield {"type": "error", "name": tool_name, "detail": str(e)}
                 else:
-                    logger.warning(f"[Session: {session_id}] Web search enabled, but no suitable search tool found.")
+                    logger.warning("[Session: %s] Web search enabled, but no suitable search tool found.", session_id)
 
             current_prompt = prompt
             if search_performed_results:
@@ -75,189 +328,250 @@ class StreamingAgent(Agent):
             # Implement actual token-by-token streaming
             full_response = ""
             streaming_successful = False
+            batcher = _ChunkBatcher()
             
             try:
-                # Try multiple approaches to access streaming capabilities
+                # Once a streaming approach has worked for this agent, go straight to it;
+                # the others are only probed if it stops working
+                strategies = self._STREAM_STRATEGIES
+                if self._stream_strategy is not None:
+                    strategies = (self._stream_strategy,) + tuple(
+                        name for name in strategies if name != self._stream_strategy
+                    )
                 
-                # Approach 1: Check if model has a direct client attribute
-                if hasattr(self.model, 'client') and self.model.client:
-                    logger.debug(f"[Session: {session_id}] Attempting streaming via model.client")
+                for strategy_name in strategies:
+                    logger.debug("[Session: %s] Attempting streaming via %s", session_id, strategy_name)
                     try:
-                        response = self.model.client.generate_content(
-                            current_prompt,
-                            stream=True
-                        )
-                        
-                        for chunk in response:
-                            if hasattr(chunk, 'text') and chunk.text:
-                                chunk_text = chunk.text
-                                full_response += chunk_text
-                                yield {"type": "llm_chunk", "content": chunk_text}
-                                await asyncio.sleep(0.01)
+                        # The SDK streams block while waiting on the network, so each chunk is pulled on a worker thread
+                        async for batch in _stream_batches(getattr(self, strategy_name)(current_prompt), batcher):
+                            full_response += batch
+                            yield {"type": "llm_chunk", "content": batch}
                         
                         streaming_successful = True
-                        logger.debug(f"[Session: {session_id}] Streaming via model.client successful")
+                        self._stream_strategy = strategy_name
+                        logger.debug("[Session: %s] Streaming via %s successful", session_id, strategy_name)
                     except Exception as e:
-                        logger.debug(f"[Session: {session_id}] Streaming via model.client failed: {e}")
-                
-                # Approach 2: Try direct Google GenerativeAI client
-                if not streaming_successful:
-                    logger.debug(f"[Session: {session_id}] Attempting streaming via google.generativeai")
-                    try:
-                        import google.generativeai as genai
-                        
-                        # Configure with API key
-                        genai.configure(api_key=global_settings.GOOGLE_API_KEY)
-                        
-                        # Get the model
-                        model = genai.GenerativeModel(global_settings.GEMINI_MODEL_ID)
-                        
-                        # Stream the response
-                        response = model.generate_content(
-                            current_prompt,
-                            stream=True
-                        )
-                        
-                        for chunk in response:
-                            if hasattr(chunk, 'text') and chunk.text:
-                                chunk_text = chunk.text
-                                full_response += chunk_text
-                                yield {"type": "llm_chunk", "content": chunk_text}
-                                await asyncio.sleep(0.01)
-                        
-                        streaming_successful = True
-                        logger.debug(f"[Session: {session_id}] Streaming via google.generativeai successful")
-                    except ImportError:
-                        logger.debug(f"[Session: {session_id}] google.generativeai not available")
-                    except Exception as e:
-                        logger.debug(f"[Session: {session_id}] Streaming via google.generativeai failed: {e}")
-                
-                # Approach 3: Check if model has a generate_stream method
-                if not streaming_successful and hasattr(self.model, 'generate_stream'):
-                    logger.debug(f"[Session: {session_id}] Attempting streaming via model.generate_stream")
-                    try:
-                        stream = self.model.generate_stream(current_prompt)
-                        for chunk in stream:
-                            if hasattr(chunk, 'content') and chunk.content:
-                                chunk_text = chunk.content
-                                full_response += chunk_text
-                                yield {"type": "llm_chunk", "content": chunk_text}
-                                await asyncio.sleep(0.01)
-                        
-                        streaming_successful = True
-                        logger.debug(f"[Session: {session_id}] Streaming via model.generate_stream successful")
-                    except Exception as e:
-                        logger.debug(f"[Session: {session_id}] Streaming via model.generate_stream failed: {e}")
+                        logger.debug("[Session: %s] Streaming via %s failed: %s", session_id, strategy_name, e)
+                    # Deliver the buffered tail, including text produced before a mid-stream failure
+                    batch = batcher.flush()
+                    if batch:
+                        full_response += batch
+                        yield {"type": "llm_chunk", "content": batch}
+                    if streaming_successful:
+                        break
                 
                 # Fallback: Simulate streaming if no direct streaming available
                 if not streaming_successful:
-                    logger.warning(f"[Session: {session_id}] No direct streaming available, simulating with word chunks")
+                    logger.warning("[Session: %s] No direct streaming available, simulating with word chunks", session_id)
+                    # agent.run may call tools, so its answer is not safe to reuse
+                    prompt_vector = None
                     
                     # Get the full response first
-                    final_agent_response = self.run(current_prompt)
+                    response_content = await self._run_in_thread(current_prompt)
                     
-                    if hasattr(final_agent_response, 'content'):
-                        response_content = final_agent_response.content
-                    elif isinstance(final_agent_response, str):
-                        response_content = final_agent_response
+                    # The response is already complete; only pace it out if explicitly configured
+                    ui_delay = global_settings.UI_SIMULATED_DELAY_MS / 1000
+                    if not ui_delay:
+                        full_response += response_content
+                        yield {"type": "llm_chunk", "content": response_content}
                     else:
-                        response_content = str(final_agent_response)
-                    
-                    # Simulate streaming by chunking the response word by word
-                    words = response_content.split()
-                    chunk_size = 2  # Stream 2 words at a time for better visual effect
-                    
-                    for i in range(0, len(words), chunk_size):
-                        chunk_words = words[i:i + chunk_size]
-                        chunk_text = " ".join(chunk_words)
-                        if i + chunk_size < len(words):
-                            chunk_text += " "
-                        
-                        full_response += chunk_text
-                        yield {"type": "llm_chunk", "content": chunk_text}
-                        await asyncio.sleep(0.05)  # Slower delay for visible streaming effect
+                        # Simulate streaming 8 words at a time; slicing keeps the original newlines
+                        for match in _SIMULATED_CHUNK_PATTERN.finditer(response_content):
+                            chunk_text = match.group()
+                            full_response += chunk_text
+                            yield {"type": "llm_chunk", "content": chunk_text}
+                            await asyncio.sleep(ui_delay)
+                
+                if prompt_vector is not None and full_response and not search_performed_results:
+                    semantic_cache.add(prompt_vector, cache_scope, full_response)
                 
                 # Send final response
                 yield {"type": "final_response", "content": full_response}
                 
             except Exception as e:
-                logger.error(f"[Session: {session_id}] Error during LLM streaming: {e}", exc_info=True)
+                # Recovered below by the non-streaming fallback; the traceback is only worth it when debugging
+                logger.error("[Session: %s] Error during LLM streaming: %s", session_id, e,
+                             exc_info=logger.isEnabledFor(logging.DEBUG))
                 
                 # Ultimate fallback to non-streaming response
-                logger.warning(f"[Session: {session_id}] Falling back to non-streaming response")
+                logger.warning("[Session: %s] Falling back to non-streaming response", session_id)
                 try:
-                    final_agent_response = self.run(current_prompt)
-                    
-                    if hasattr(final_agent_response, 'content'):
-                        response_content = final_agent_response.content
-                    elif isinstance(final_agent_response, str):
-                        response_content = final_agent_response
-                    else:
-                        response_content = str(final_agent_response)
+                    response_content = await self._run_in_thread(current_prompt)
                     
                     yield {"type": "llm_chunk", "content": response_content}
                     yield {"type": "final_response", "content": response_content}
                 except Exception as fallback_error:
-                    logger.error(f"[Session: {session_id}] Even fallback response failed: {fallback_error}", exc_info=True)
+                    logger.error("[Session: %s] Even fallback response failed: %s", session_id, fallback_error, exc_info=True)
                     yield {"type": "error", "detail": f"Failed to generate response: {str(fallback_error)}"}
             
-            logger.info(f"[Session: {session_id}] Streaming agent run completed successfully.")
+            logger.info("[Session: %s] Streaming agent run completed successfully.", session_id)
             
         except Exception as e:
-            logger.error(f"[Session: {session_id}] Error during streaming agent run: {e}", exc_info=True)
+            logger.error("[Session: %s] Error during streaming agent run: %s", session_id, e, exc_info=True)
             yield {"type": "error", "detail": f"An unexpected error occurred: {str(e)}"}
 
-    async def _needs_web_search(self, prompt: str) -> bool:
-        prompt_lower = prompt.lower()
-        search_keywords = [
-            "latest news", "current events", "what is the weather", "define", "who is", 
-            "what is", "how to", "search for", "find information on", "stock price",
-            "recent updates", "statistics for", "release date"
+    def _stream_via_model_client(self, prompt: str) -> Iterator[str]:
+        """Streams through the model's own client (Gemini); OpenRouter's async client has no generate_content."""
+        if not getattr(self.model, 'client', None):
+            raise RuntimeError("model has no client")
+        for chunk in self.model.client.generate_content(prompt, stream=True):
+            if hasattr(chunk, 'text') and chunk.text:
+                yield chunk.text
+
+    def _stream_via_genai(self, prompt: str) -> Iterator[str]:
+        """Streams through a direct google.generativeai model."""
+        if genai is None:
+            raise RuntimeError("google.generativeai not available")
+        for chunk in _genai_model(global_settings.GEMINI_MODEL_ID).generate_content(prompt, stream=True):
+            if hasattr(chunk, 'text') and chunk.text:
+                yield chunk.text
+
+    def _stream_via_generate_stream(self, prompt: str) -> Iterator[str]:
+        """Streams through the model's generate_stream method, if it has one."""
+        if not hasattr(self.model, 'generate_stream'):
+            raise RuntimeError("model has no generate_stream")
+        for chunk in self.model.generate_stream(prompt):
+            if hasattr(chunk, 'content') and chunk.content:
+                yield chunk.content
+
+    async def _run_in_thread(self, prompt: str) -> str:
+        """
+        Non-streaming run for the fallbacks. agno's run() is blocking, so it goes to a worker
+        thread rather than stalling every other session on the event loop.
+        """
+        final_agent_response = await asyncio.to_thread(self.run, prompt)
+        if hasattr(final_agent_response, 'content'):
+            return final_agent_response.content
+        if isinstance(final_agent_response, str):
+            return final_agent_response
+        return str(final_agent_response)
+
+    @cached_property
+    def _web_search_tools(self) -> Tuple[Any, ...]:
+        """
+        Search-capable tools, partitioned once per agent instead of on every prompt.
+        Code that swaps self.tools after construction must `del` this and the other
+        tool-derived cached properties (integrations, tool_names) to rescan.
+        """
+        return tuple(t for t in self.tools or () if hasattr(t, 'search') and t.__class__.__name__ == "DuckDuckGoTools")
+
+    @cached_property
+    def integrations(self) -> List[Dict[str, str]]:
+        """Name/description/status of each loaded tool, built once for /health and /integrations."""
+        return [
+            {
+                "name": tool.name if hasattr(tool, 'name') else tool.__class__.__name__,
+                "description": tool.description if hasattr(tool, 'description') else "N/A",
+                "status": "enabled"  # Assuming all loaded tools are enabled
+            }
+            for tool in self.tools or ()
         ]
-        if any(keyword in prompt_lower for keyword in search_keywords):
-            return True
-        if "?" in prompt and len(prompt.split()) > 5:
+
+    @cached_property
+    def tool_names(self) -> List[str]:
+        return [integration["name"] for integration in self.integrations]
+
+    def _needs_web_search(self, prompt: str) -> bool:
+        # The question heuristic is cheaper than the keyword scan, so it runs first.
+        # Stops after the sixth word; split(maxsplit=5) would still copy the rest of the prompt
+        if "?" in prompt and sum(1 for _ in islice(_WORD_PATTERN.finditer(prompt), 6)) > 5:
             return True
-        return False
+        # Case-insensitive match on the original string; no lowercased copy is made
+        return _contains_search_keyword(prompt)
 
-    def _extract_search_query(self, prompt: str) -> str:
-        if len(prompt) < 100:
-            return prompt 
-        return prompt[:150] + "..." if len(prompt) > 150 else prompt
+    async def _cached_search(self, tool: Any, query: str) -> Tuple[Any, bool]:
+        """Run a web search, reusing a recent result for the same query. Returns (results, cache_hit)."""
+        cache = StreamingAgent._search_cache
+        # Keyed per tool as well as per query: agents configured with different search tools must not share results
+        tool_class = type(tool)
+        key = (f"{tool_class.__module__}.{tool_class.__qualname__}", str(getattr(tool, "name", "")), " ".join(query.lower().split()))
+        now = time.monotonic()
+
+        # No lock: each dict operation completes without yielding to the event loop.
+        # Two concurrent misses for the same query may both search; the later fill wins.
+        entry = cache.get(key)
+        if entry is not None:
+            if now - entry[0] < global_settings.SEARCH_CACHE_TTL:
+                cache.move_to_end(key)
+                StreamingAgent._search_cache_hits += 1
+                return entry[1], True
+            # Drop the stale entry now so a failed refresh can't leave it behind
+            del cache[key]
+
+        StreamingAgent._search_cache_misses += 1
+        # On timeout the worker thread finishes in the background; its result is discarded
+        results = await asyncio.wait_for(
+            asyncio.to_thread(tool.search, query), timeout=global_settings.WEB_SEARCH_TIMEOUT
+        )
+        cache[key] = (time.monotonic(), results)
+        cache.move_to_end(key)
+        while len(cache) > global_settings.SEARCH_CACHE_MAX:
+            cache.popitem(last=False)
+        logger.debug(
+            "Search cache: %d hits, %d misses, %d entries",
+            StreamingAgent._search_cache_hits, StreamingAgent._search_cache_misses, len(cache)
+        )
+        return results, False
+
+    @staticmethod
+    def _extract_search_query(prompt: str) -> str:
+        query = prompt.strip()
+        query_len = len(query)
+        if query_len <= SHORT_SEARCH_QUERY_CHARS:
+            return query
+        # Longer prompts usually carry context around the actual ask; search for the sentence
+        # that asks something (a question or a search phrase), falling back to the first one
+        sentences = [match.group().strip() for match in _SENTENCE_PATTERN.finditer(query)]
+        if len(sentences) > 1:
+            query = next(
+                (sentence for sentence in sentences
+                 if sentence.endswith("?") or _SEARCH_KEYWORD_PATTERN.search(sentence)),
+                sentences[0]
+            )
+            query_len = len(query)
+        if query_len <= MAX_SEARCH_QUERY_CHARS:
+            return query
+        # Cut on a word boundary; a trailing "..." would only be noise to the search engine
+        cut = query.rfind(" ", 0, MAX_SEARCH_QUERY_CHARS)
+        return query[:cut if cut > 0 else MAX_SEARCH_QUERY_CHARS]
 
     def _add_search_context_to_prompt(self, prompt: str, search_results: Any) -> str:
-        context_str = "\n\nRelevant information from web search (use this to answer the query):\n"
         if isinstance(search_results, list) and search_results:
-            for i, res in enumerate(search_results[:3]):
-                title = res.get('title', 'N/A')
-                snippet = res.get('snippet', res.get('body', 'N/A'))
-                url = res.get('href', res.get('link', 'N/A'))
-                context_str += f"{i+1}. Title: {title}\n   Snippet: {snippet[:200]}...\n   Source: {url}\n"
+            top_results = tuple(
+                (
+                    res.get('title', 'N/A'),
+                    (res.get('snippet') or res.get('body', 'N/A'))[:200],
+                    res.get('href') or res.get('link', 'N/A'),
+                )
+                for res in search_results[:3]
+            )
+            context = _format_search_results(top_results)
         elif isinstance(search_results, str):
-            context_str += search_results[:1000]
+            context = search_results[:1000]
         elif search_results:
-             context_str += str(search_results)[:1000]
+            context = str(search_results)[:1000]
         else:
             return prompt
-        return f"{prompt}{context_str}\n\nBased on the information above, please answer the original query."
+        return "".join((
+            prompt,
+            "\n\nRelevant information from web search (use this to answer the query):\n",
+            context,
+            "\n\nBased on the information above, please answer the original query.",
+        ))
 
 
 def create_gemini_model(model_id: Optional[str] = None, api_key: Optional[str] = None) -> Gemini:
     resolved_api_key = api_key or global_settings.GOOGLE_API_KEY
     resolved_model_id = model_id or global_settings.GEMINI_MODEL_ID
 
-    # Need a way to validate the API key without creating a full Settings instance if an API key is passed directly.
-    # For now, we rely on the global_settings.is_google_api_key_valid for the settings-derived key,
-    # and a basic check for a directly passed key.
-    key_to_validate = resolved_api_key
-    is_valid_passed_key = bool(key_to_validate and not key_to_validate.startswith("your") and len(key_to_validate) > 20)
-
-    if not ( (api_key and is_valid_passed_key) or (not api_key and global_settings.is_google_api_key_valid) ):
+    # Same memoized check for a directly passed key and the settings-derived one
+    if not is_valid_google_api_key(resolved_api_key):
         logger.error("Google API Key is not set or appears invalid.")
         raise ValueError("Google API Key is not set or invalid. Please check your .env file or configuration.")
     
-    logger.info(f"Initializing Gemini model: {resolved_model_id}")
+    logger.info("Initializing Gemini model: %s", resolved_model_id)
     return Gemini(
         id=resolved_model_id,
-        api_key=resolved_api_key
+        api_key=resolved_api_key,
+        temperature=global_settings.MODEL_TEMPERATURE,
     ) 
\ No newline at end of file
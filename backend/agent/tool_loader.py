@@ -8,7 +8,7 @@ import importlib
 import pkgutil
 import logging
 from pathlib import Path
-from typing import List, Any
+from typing import List, Any, Optional
 
 # Import specific Agno tools that we want to use
 from agno.tools.reasoning import ReasoningTools
@@ -22,6 +22,11 @@ logger = logging.getLogger(__name__)
 TOOLS_DIR = Path(__file__).parent.parent / "tools"
 TOOLS_PACKAGE_PATH = "backend.tools"  # Python import path for tools
 
+# Tool instances are built on the first load and shared by every agent afterwards
+_TOOLS_CACHE: Optional[List[Any]] = None
+# Set once TOOLS_DIR is known to have an __init__.py, so later scans skip the check
+_tools_package_ready = False
+
 def load_all_tools() -> List[Any]:
     """
     Load all tools for the AIDEN V2 agent.
@@ -31,8 +36,13 @@ def load_all_tools() -> List[Any]:
     2. Custom tools from the backend/tools directory
     
     Returns:
-        List[Any]: List of tool instances ready to be used by the agent
+        List[Any]: List of tool instances ready to be used by the agent.
+        The list is a fresh copy; the tool instances themselves are shared.
     """
+    global _TOOLS_CACHE
+    if _TOOLS_CACHE is not None:
+        return list(_TOOLS_CACHE)
+
     tool_instances = []
     
     # Add pre-configured Agno tools
@@ -47,7 +57,18 @@ def load_all_tools() -> List[Any]:
         tool_instances.extend(custom_tools)
         
     logger.info(f"Loaded {len(tool_instances)} tools in total")
-    return tool_instances
+    _TOOLS_CACHE = tool_instances
+    return list(tool_instances)
+
+def reload_tools() -> None:
+    """
+    Drop the cached tool instances so the next load_all_tools() rescans backend/tools.
+    New tool modules are picked up; modules that were already imported are not re-executed.
+    To refresh the tools new agents are built with, call backend.agent.agent_factory.reload_tools(),
+    which also drops the tool sets memoized on top of this cache.
+    """
+    global _TOOLS_CACHE
+    _TOOLS_CACHE = None
 
 def load_custom_tools() -> List[Any]:
     """
@@ -59,6 +80,7 @@ def load_custom_tools() -> List[Any]:
     Returns:
         List[Any]: List of custom tool instances
     """
+    global _tools_package_ready
     custom_tools = []
     
     if not TOOLS_DIR.exists() or not TOOLS_DIR.is_dir():
@@ -68,16 +90,20 @@ def load_custom_tools() -> List[Any]:
     logger.info(f"Looking for custom tools in: {TOOLS_DIR}")
 
     # Create __init__.py if it doesn't exist to make the directory a proper package
-    init_file = TOOLS_DIR / "__init__.py"
-    if not init_file.exists():
-        init_file.touch()
-        logger.info(f"Created {init_file} to make the tools directory a proper package")
-
-    # Iterate through modules in the tools directory
-    for _, module_name, _ in pkgutil.iter_modules([str(TOOLS_DIR)]):
-        if module_name.startswith("__"):  # Skip __init__.py etc.
-            continue
-            
+    if not _tools_package_ready:
+        init_file = TOOLS_DIR / "__init__.py"
+        if not init_file.exists():
+            init_file.touch()
+            logger.info(f"Created {init_file} to make the tools directory a proper package")
+        _tools_package_ready = True
+
+    # One directory scan; skip __init__.py etc.
+    module_names = [
+        module_name for _, module_name, _ in pkgutil.iter_modules([str(TOOLS_DIR)])
+        if not module_name.startswith("__")
+    ]
+
+    for module_name in module_names:
         try:
             module_path = f"{TOOLS_PACKAGE_PATH}.{module_name}"
             module = importlib.import_module(module_path)
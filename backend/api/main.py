@@ -4,9 +4,13 @@ AIDEN V2 FastAPI Application Main
 Initializes the FastAPI app, CORS, logging, and handles startup/shutdown events
 such as initializing the database and the agent.
 """
+import atexit
 import logging
 import asyncio
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from backend.config import settings
@@ -19,30 +23,66 @@ try:
 except Exception:
     pass
 from backend.core.memory import memory_manager # Updated import
-from backend.agent.agent_factory import initialize_global_agent, get_agent_instance # Updated import
+from backend.agent.agent_factory import initialize_global_agent # Updated import
+from backend.models.openrouter import close_shared_clients
 from .routes import router as api_router # Will create routes.py next
 
-# Configure logging basicConfig should be called once, typically at the application entry point.
-# If other modules also call it, it might lead to unexpected behavior or suppress logs.
-# We can refine this later if needed, e.g. using a common logging setup utility.
-logging.basicConfig(level=logging.INFO if settings.ENVIRONMENT == "production" else logging.DEBUG)
+# Configure logging once, at the application entry point.
+# Request handlers only enqueue records; a listener thread formats and writes them,
+# so console I/O never runs on the event loop (SSE streams log on every event).
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+_log_listener = QueueListener(_log_queue, _log_stream_handler, respect_handler_level=True)
+
+class _RawQueueHandler(QueueHandler):
+    """
+    Queues records untouched. The stock prepare() merges the message args and
+    formats the traceback on the calling thread; here the listener's handler does
+    all formatting. Records stay in-process, so nothing needs to be made picklable.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+# Not basicConfig: it would give the QueueHandler a formatter too
+_root_logger = logging.getLogger()
+_root_logger.setLevel(logging.INFO if settings.ENVIRONMENT == "production" else logging.DEBUG)
+_root_logger.addHandler(_RawQueueHandler(_log_queue))
+# Running from the moment records can be queued until interpreter exit, so nothing logged at import,
+# without a lifespan (scripts, TestClient) or after shutdown is lost. Import-time only: one listener per process
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__) # Main application logger
 
+try:
+    import orjson  # noqa: F401  (ORJSONResponse needs it at render time)
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    DefaultResponse = JSONResponse
+
 app = FastAPI(
     title="AIDEN V2 Agent API",
     description="Next-generation AI Personal Assistant API leveraging Agno and Gemini.",
     version="2.0.0",
     debug=not settings.is_production,
+    default_response_class=DefaultResponse,
     # Add other FastAPI configurations like docs_url, redoc_url if needed
 )
 
 # CORS Middleware Configuration
+CORS_ALLOW_METHODS = ("GET", "POST", "PUT", "DELETE", "OPTIONS")
+# Explicit list rather than "*", which makes Starlette echo back whatever the preflight asks for
+CORS_ALLOW_HEADERS = ("Accept", "Accept-Language", "Authorization", "Cache-Control", "Content-Language", "Content-Type", "Last-Event-ID")
+# Browsers may reuse a preflight for this long (they cap it themselves: Chromium at 2h, Firefox at 24h)
+CORS_MAX_AGE = 86400
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"], # Expanded methods
-    allow_headers=["*"] # Allow all headers
+    allow_methods=CORS_ALLOW_METHODS,
+    allow_headers=CORS_ALLOW_HEADERS,
+    max_age=CORS_MAX_AGE
 )
 
 @app.on_event("startup")
@@ -70,15 +110,9 @@ async def startup_event_handler():
     
     logger.info("Initializing AIDEN Agent...")
     try:
-        # Initialize the global agent instance (default to "main" type)
+        # Register the global agent (default to "main" type); it is built on first use
         initialize_global_agent(agent_type="main") 
-        # Attempt to get the instance to confirm it was set
-        _ = get_agent_instance() # This will raise RuntimeError if current_agent is None
-        logger.info("✅ AIDEN Agent initialized successfully.")
-    except ValueError as ve: # Specific error from create_gemini_model if API key is bad
-        logger.critical(f"❌ CRITICAL: Failed to initialize agent due to configuration: {ve}", exc_info=True)
-    except RuntimeError as re:
-        logger.critical(f"❌ CRITICAL: Failed to initialize agent: {re}", exc_info=True)
+        logger.info("✅ AIDEN Agent registered; it will be created on the first request that needs it.")
     except Exception as e:
         logger.critical(f"❌ CRITICAL: An unexpected error occurred during agent initialization: {e}", exc_info=True)
     
@@ -88,7 +122,9 @@ async def startup_event_handler():
 async def shutdown_event_handler():
     """Handles application shutdown events."""
     logger.info("🛌 AIDEN V2 API is shutting down...")
-    # Add any cleanup logic here (e.g., closing database connections if not handled by context managers)
+    # Lets conversation saves scheduled by the chat endpoints land before the connection closes
+    await memory_manager.close()
+    await close_shared_clients()
     logger.info("👋 Goodbye!")
 
 # Include API routes
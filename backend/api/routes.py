@@ -6,7 +6,8 @@ Defines the API endpoints for chat, streaming, health checks, and other interact
 import logging
 import json
 import asyncio
-from typing import Dict, Any, List, Optional, AsyncGenerator
+import re
+from typing import Dict, Any, List, Optional, AsyncGenerator, Tuple
 
 from fastapi import APIRouter, Form, HTTPException, Depends, Query, Body
 from fastapi.responses import StreamingResponse, JSONResponse
@@ -14,16 +15,33 @@ from pydantic import BaseModel, Field
 
 from backend.config import settings
 from backend.core.memory import memory_manager
-from backend.agent.agent_factory import get_agent_instance # To get the initialized agent
+from backend.agent.agent_factory import get_agent_instance, is_agent_instantiated # To get the initialized agent
 from backend.agent.base_agent import StreamingAgent # For type hinting
 from .voice import router as voice_router  # Import voice endpoints
 
+try:
+    import orjson
+
+    def _sse_frame(event: Dict[str, Any]) -> bytes:
+        """Encodes one event as an SSE data frame."""
+        return b"data: " + orjson.dumps(event, default=str) + b"\n\n"
+except ImportError:
+    def _sse_frame(event: Dict[str, Any]) -> bytes:
+        """Encodes one event as an SSE data frame."""
+        return b"data: " + json.dumps(event, default=str).encode() + b"\n\n"
+
+# Provider error messages that mean "rate limited"; one case-insensitive pass, no lowercased copy
+_RATE_LIMIT_PATTERN = re.compile(r"rate ?limit|quota exceeded|\b429\b", re.IGNORECASE)
+
 logger = logging.getLogger(__name__)
 router = APIRouter() # Main router for the API
 
 # Include voice endpoints
 router.include_router(voice_router)
 
+# Bounds concurrent /chat agent runs; requests beyond this get a 503 instead of queueing
+_agent_run_slots = asyncio.Semaphore(settings.AGENT_CONCURRENCY)
+
 # --- Request Models --- #
 class ChatMessageInput(BaseModel):
     message: str = Field(..., description="The user's message to the agent.", min_length=1)
@@ -34,9 +52,12 @@ class ChatMessageInput(BaseModel):
 async def get_current_active_agent() -> StreamingAgent:
     """Dependency to get the currently active (initialized) agent instance."""
     try:
-        return get_agent_instance()
+        if is_agent_instantiated():
+            return get_agent_instance()
+        # The first request builds the agent; do that off the event loop
+        return await asyncio.to_thread(get_agent_instance)
     except RuntimeError as e:
-        logger.error(f"Agent not available: {e}")
+        logger.error("Agent not available: %s", e)
         raise HTTPException(
             status_code=503, 
             detail="AIDEN agent is not currently available. Please try again later or contact support."
@@ -53,7 +74,7 @@ async def chat_endpoint(
     Handles a single chat message and returns a complete response from the agent.
     Conversation history is automatically retrieved and prepended to the prompt.
     """
-    logger.info(f"[/chat] Received message for session '{payload.session_id}': '{payload.message[:50]}...'")
+    logger.debug("[/chat] Received message for session '%s': '%.50s...'", payload.session_id, payload.message)
     
     try:
         history_context = await memory_manager.get_formatted_conversation_history(
@@ -61,20 +82,25 @@ async def chat_endpoint(
             limit=settings.MAX_HISTORY_MESSAGES
         )
         
-        full_prompt = payload.message.strip()
+        user_message = payload.message.strip()
+        full_prompt = user_message
         if history_context:
-            full_prompt = f"{history_context}\n\nUser: {payload.message.strip()}"
-            logger.debug(f"[/chat] Using context of {len(history_context.splitlines())} lines for session '{payload.session_id}'.")
+            full_prompt = f"{history_context}\n\nUser: {user_message}"
+            logger.debug("[/chat] Using %d chars of context for session '%s'.", len(history_context), payload.session_id)
 
-        # The agent.run() is synchronous in the current Agno structure for StreamingAgent
-        # If Agno's agent.run() becomes async, this should be awaited.
-        response_obj = agent.run(full_prompt) 
+        # agent.run() is synchronous in the current Agno structure; run it on a worker thread
+        # so other requests keep being served during the LLM round-trip
+        if _agent_run_slots.locked():
+            raise HTTPException(status_code=503, detail="AIDEN is handling too many requests right now. Please try again shortly.")
+        async with _agent_run_slots:
+            response_obj = await asyncio.to_thread(agent.run, full_prompt)
         
         agent_response_content = getattr(response_obj, 'content', str(response_obj))
         
-        await memory_manager.add_conversation_turn(
+        # The client already has its answer; don't make it wait for the write
+        memory_manager.add_conversation_turn_in_background(
             session_id=payload.session_id,
-            user_message=payload.message.strip(), 
+            user_message=user_message,
             agent_response=agent_response_content
         )
         
@@ -89,65 +115,114 @@ async def chat_endpoint(
         raise
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"[/chat] Error processing message for session '{payload.session_id}': {error_msg}", exc_info=True)
+        logger.error("[/chat] Error processing message for session '%s': %s", payload.session_id, error_msg, exc_info=True)
         
         # Basic check for rate limiting type errors from LLM provider
-        if any(keyword in error_msg.lower() for keyword in ["rate limit", "ratelimit", "quota exceeded", "429"]):
+        if _RATE_LIMIT_PATTERN.search(error_msg):
             raise HTTPException(status_code=429, detail="The AI model is currently experiencing high demand (rate limit). Please try again shortly.")
         
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred while processing your message: {error_msg}")
 
-async def sse_event_generator(prompt: str, session_id: str, agent_instance: StreamingAgent) -> AsyncGenerator[str, None]:
+def sse_event_generator(prompt: str, user_message: str, session_id: str, agent_instance: StreamingAgent) -> AsyncGenerator[bytes, None]:
     """
     Server-Sent Events (SSE) generator for streaming agent responses.
-    Yields events from the agent's `stream_run` method.
+    Yields events from the agent's `stream_run` method, with bursts of small frames coalesced into one write.
+    """
+    return _coalesce_sse_frames(_sse_event_frames(prompt, user_message, session_id, agent_instance))
+
+async def _coalesce_sse_frames(frames: AsyncGenerator[Tuple[bytes, bool], None]) -> AsyncGenerator[bytes, None]:
+    """
+    Buffers (frame, urgent) pairs and yields them joined: once SSE_FLUSH_BYTES are buffered,
+    SSE_FLUSH_MS after the oldest buffered frame (even if the stream goes quiet), or right away for urgent frames.
+    If the frame source raises, the buffered frames are yielded before the exception propagates.
     """
-    logger.debug(f"[SSE] Starting event generator for session '{session_id}'.")
-    full_response_content = ""
+    loop = asyncio.get_running_loop()
+    buffer = bytearray()
+    deadline = 0.0
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if buffer:
+                # Wait for the next frame only until the buffer is due; the pending read is kept, not cancelled
+                if pending is None:
+                    pending = asyncio.ensure_future(frames.__anext__())
+                done, _ = await asyncio.wait((pending,), timeout=max(deadline - loop.time(), 0))
+                if not done:
+                    yield bytes(buffer)
+                    buffer.clear()
+                    continue
+            next_frame, pending = (pending or frames.__anext__()), None
+            try:
+                frame, urgent = await next_frame
+            except StopAsyncIteration:
+                break
+            except Exception:
+                if buffer:
+                    yield bytes(buffer)
+                    buffer.clear()
+                raise
+            if not buffer:
+                deadline = loop.time() + settings.SSE_FLUSH_MS / 1000
+            buffer += frame
+            if urgent or len(buffer) >= settings.SSE_FLUSH_BYTES:
+                yield bytes(buffer)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+    finally:
+        # Client disconnects land here; stop the in-flight read so the agent stream is torn down
+        if pending is not None:
+            pending.cancel()
+
+async def _sse_event_frames(prompt: str, user_message: str, session_id: str, agent_instance: StreamingAgent) -> AsyncGenerator[Tuple[bytes, bool], None]:
+    """
+    Encodes agent events as SSE frames, paired with whether the frame should be sent without buffering.
+    Only llm_chunk frames are buffered; status, tool, final and error events go out immediately.
+    Saves the finished conversation turn to memory.
+    """
+    response_parts: List[str] = []
     last_event_data = None
 
     try:
-        async for event_data in agent_instance.stream_run(prompt, session_id=session_id):
+        async for event_data in agent_instance.stream_run(prompt, session_id=session_id, user_message=user_message):
             last_event_data = event_data # Keep track of the last event for DB saving
-            yield f"data: {json.dumps(event_data)}\n\n"
-            await asyncio.sleep(0.01) # Small sleep to ensure event flushing
+            yield _sse_frame(event_data), event_data.get("type") != "llm_chunk"
 
             if event_data.get("type") == "llm_chunk" and "content" in event_data:
-                full_response_content += event_data["content"]
+                response_parts.append(event_data["content"])
             elif event_data.get("type") == "final_response" and "content" in event_data:
-                full_response_content = event_data["content"] # final_response overrides chunks
+                response_parts = [event_data["content"]] # final_response overrides chunks
         
+        full_response_content = "".join(response_parts)
         # After the stream finishes, save the conversation if a response was generated and no critical error occurred
         if full_response_content and not (last_event_data and last_event_data.get("type") == "error" and last_event_data.get("critical")):
-            await memory_manager.add_conversation_turn(
+            memory_manager.add_conversation_turn_in_background(
                 session_id=session_id,
-                user_message=prompt.split("\n\nUser:")[-1].strip() if "\n\nUser:" in prompt else prompt, # Extract original user msg
+                user_message=user_message,
                 agent_response=full_response_content,
                 metadata={"streamed": True, "final_event": last_event_data}
             )
-            logger.debug(f"[SSE] Saved streamed conversation for session '{session_id}'.")
+            logger.debug("[SSE] Scheduled save of streamed conversation for session '%s'.", session_id)
         elif not full_response_content:
-            logger.warning(f"[SSE] No response content generated to save for session '{session_id}'. Last event: {last_event_data}")
+            logger.warning("[SSE] No response content generated to save for session '%s'. Last event: %s", session_id, last_event_data)
 
     except HTTPException: # Let HTTPExceptions propagate if raised by agent or dependencies
         error_payload = {"type": "error", "detail": "An internal server error occurred during streaming.", "critical": True}
-        yield f"data: {json.dumps(error_payload)}\n\n"
+        yield _sse_frame(error_payload), True
         raise # Re-raise to be handled by FastAPI error handlers
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"[SSE] Error during streaming chat for session '{session_id}': {error_msg}", exc_info=True)
+        logger.error("[SSE] Error during streaming chat for session '%s': %s", session_id, error_msg, exc_info=True)
         error_type = "error"
         detail_msg = f"An unexpected error occurred during streaming: {error_msg}"
         critical_error = True # Assume unexpected errors are critical for client handling
 
-        if any(keyword in error_msg.lower() for keyword in ["rate limit", "ratelimit", "quota exceeded", "429"]):
+        if _RATE_LIMIT_PATTERN.search(error_msg):
             detail_msg = "The AI model is currently experiencing high demand (rate limit). Please try again shortly."
             # For SSE, we send an error event; client should handle this.
         
         error_payload = {"type": error_type, "detail": detail_msg, "critical": critical_error}
-        yield f"data: {json.dumps(error_payload)}\n\n"
-    finally:
-        logger.debug(f"[SSE] Event generator finished for session '{session_id}'.")
+        yield _sse_frame(error_payload), True
 
 @router.post("/chat-stream", tags=["Chat"], summary="Send a message for a streaming response (SSE)")
 async def chat_stream_post_endpoint(
@@ -158,20 +233,21 @@ async def chat_stream_post_endpoint(
     Handles chat messages and provides a streaming response using Server-Sent Events (SSE).
     Conversation history is automatically prepended.
     """
-    logger.info(f"[/chat-stream POST] Received message for session '{payload.session_id}': '{payload.message[:50]}...'")
+    logger.debug("[/chat-stream POST] Received message for session '%s': '%.50s...'", payload.session_id, payload.message)
     
     history_context = await memory_manager.get_formatted_conversation_history(
         session_id=payload.session_id, 
         limit=settings.MAX_HISTORY_MESSAGES
     )
     
-    full_prompt_with_history = payload.message.strip()
+    user_message = payload.message.strip()
+    full_prompt_with_history = user_message
     if history_context:
-        full_prompt_with_history = f"{history_context}\n\nUser: {payload.message.strip()}"
-        logger.debug(f"[/chat-stream POST] Using context of {len(history_context.splitlines())} lines for session '{payload.session_id}'.")
+        full_prompt_with_history = f"{history_context}\n\nUser: {user_message}"
+        logger.debug("[/chat-stream POST] Using %d chars of context for session '%s'.", len(history_context), payload.session_id)
 
     return StreamingResponse(
-        sse_event_generator(full_prompt_with_history, payload.session_id, agent), 
+        sse_event_generator(full_prompt_with_history, user_message, payload.session_id, agent),
         media_type="text/event-stream"
     )
 
@@ -185,20 +261,21 @@ async def chat_stream_get_endpoint(
     GET version of the chat-stream endpoint. Convenient for browser testing.
     Conversation history is automatically prepended.
     """
-    logger.info(f"[/chat-stream GET] Received message for session '{session_id}': '{message[:50]}...'")
+    logger.debug("[/chat-stream GET] Received message for session '%s': '%.50s...'", session_id, message)
 
     history_context = await memory_manager.get_formatted_conversation_history(
         session_id=session_id, 
         limit=settings.MAX_HISTORY_MESSAGES
     )
     
-    full_prompt_with_history = message.strip()
+    user_message = message.strip()
+    full_prompt_with_history = user_message
     if history_context:
-        full_prompt_with_history = f"{history_context}\n\nUser: {message.strip()}"
-        logger.debug(f"[/chat-stream GET] Using context of {len(history_context.splitlines())} lines for session '{session_id}'.")
+        full_prompt_with_history = f"{history_context}\n\nUser: {user_message}"
+        logger.debug("[/chat-stream GET] Using %d chars of context for session '%s'.", len(history_context), session_id)
 
     return StreamingResponse(
-        sse_event_generator(full_prompt_with_history, session_id, agent), 
+        sse_event_generator(full_prompt_with_history, user_message, session_id, agent), 
         media_type="text/event-stream"
     )
 
@@ -211,15 +288,18 @@ async def health_check() -> Dict[str, Any]:
     agent_status = "unknown"
     agent_tools = []
     try:
-        current_agent = get_agent_instance() # Checks if agent is initialized
-        agent_status = "healthy"
-        if current_agent and hasattr(current_agent, 'tools'):
-            agent_tools = [tool.name if hasattr(tool, 'name') else tool.__class__.__name__ for tool in current_agent.tools]
+        # Health checks report state without forcing the lazy agent build
+        if is_agent_instantiated():
+            current_agent = get_agent_instance()
+            agent_status = "healthy"
+            agent_tools = current_agent.tool_names
+        else:
+            agent_status = "idle (created on first request)"
     except RuntimeError:
         agent_status = "unavailable (not initialized)"
     except Exception as e:
         agent_status = f"error ({str(e)})"
-        logger.error(f"[/health] Error during agent status check: {e}", exc_info=True)
+        logger.error("[/health] Error during agent status check: %s", e, exc_info=True)
 
     return {
         "api_status": "healthy",
@@ -241,14 +321,7 @@ async def list_integrations(
     Lists all tools currently loaded and available to the main agent.
     """
     logger.debug("[/integrations] Integrations list requested.")
-    integrations = []
-    if agent and hasattr(agent, "tools") and agent.tools:
-        for tool in agent.tools:
-            integrations.append({
-                "name": tool.name if hasattr(tool, 'name') else tool.__class__.__name__,
-                "description": tool.description if hasattr(tool, 'description') else "N/A",
-                "status": "enabled" # Assuming all loaded tools are enabled
-            })
-    return {"integrations": integrations}
+    # Built once per agent; tools only change when the agent is rebuilt
+    return {"integrations": agent.integrations}
 
 # Add more routes here as needed, e.g., for specific tool interactions, memory management, etc. 
\ No newline at end of file
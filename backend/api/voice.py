@@ -9,6 +9,7 @@ import asyncio
 import logging
 import json
 import base64
+import uuid
 from typing import Optional, Dict, Any
 from io import BytesIO
 
@@ -222,7 +223,10 @@ async def voice_stream_websocket(websocket: WebSocket):
     
     try:
         vm = get_voice_manager()
-        agent = get_agent_instance()
+        # The first call builds the agent (model client, tools); keep that off the event loop
+        agent = await asyncio.to_thread(get_agent_instance)
+        # Each connection is its own session, so per-session state (e.g. cached replies) isn't shared between callers
+        session_id = f"voice-{uuid.uuid4().hex}"
         
         # Start voice mode
         await vm.start_voice_mode()
@@ -241,7 +245,7 @@ async def voice_stream_websocket(websocket: WebSocket):
             try:
                 # Stream response from agent
                 full_response = ""
-                async for event in agent.stream_run(user_input):
+                async for event in agent.stream_run(user_input, session_id=session_id):
                     if event["type"] == "llm_chunk":
                         full_response += event["content"]
                     elif event["type"] == "final_response":
@@ -2,6 +2,7 @@
 Configuration module for AIDEN V2 Backend
 """
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Optional
 from dotenv import load_dotenv
@@ -11,6 +12,11 @@ from dotenv import load_dotenv
 env_path = Path(__file__).resolve().parent.parent / ".env"
 load_dotenv(dotenv_path=env_path)
 
+@lru_cache(maxsize=8)
+def is_valid_google_api_key(key: Optional[str]) -> bool:
+    """Check that a Google API key is set and isn't a placeholder; memoized per key string"""
+    return bool(key and not key.startswith("your") and len(key) > 20)
+
 class Settings:
     """Application settings and configuration"""
 
@@ -27,6 +33,9 @@ class Settings:
     USE_OPENROUTER: bool = os.getenv("USE_OPENROUTER", "True").lower() in ("true", "1", "t")
     OPENROUTER_API_KEY: Optional[str] = os.getenv("OPENROUTER_API_KEY")
     OPENROUTER_MODEL_ID: str = os.getenv("OPENROUTER_MODEL_ID", "meta-llama/llama-4-maverick:free")
+    # Comma-separated providers tried in order when creating the model
+    MODEL_FALLBACK_CHAIN_STRING: str = os.getenv("MODEL_FALLBACK_CHAIN", "openrouter,gemini")
+    MODEL_FALLBACK_CHAIN: List[str] = [provider.strip().lower() for provider in MODEL_FALLBACK_CHAIN_STRING.split(',') if provider.strip()]
     
     # Fallback to Google Gemini if OpenRouter not available
     GOOGLE_API_KEY: Optional[str] = os.getenv("GOOGLE_API_KEY")
@@ -43,12 +52,28 @@ class Settings:
 
     # Performance
     USE_UVLOOP: bool = os.getenv("USE_UVLOOP", "True").lower() in ("true", "1", "t")
+    AGENT_CONCURRENCY: int = int(os.getenv("AGENT_CONCURRENCY", "8"))  # Concurrent /chat agent runs before 503s
+    STREAM_WORKER_THREADS: int = int(os.getenv("STREAM_WORKER_THREADS", "16"))  # Threads reading model streams; more concurrent streams wait their turn
+    CLI_HISTORY_MAX: int = int(os.getenv("CLI_HISTORY_MAX", "1000"))  # Chat turns the CLI keeps in memory (at least 1)
+    STREAM_COALESCE_CHARS: int = int(os.getenv("STREAM_COALESCE_CHARS", "256"))  # Model text buffered before an llm_chunk is sent
+    STREAM_COALESCE_DELAY_MS: int = int(os.getenv("STREAM_COALESCE_DELAY_MS", "20"))  # Longest a chunk waits in that buffer
+    SSE_FLUSH_BYTES: int = int(os.getenv("SSE_FLUSH_BYTES", "4096"))  # Buffered SSE bytes that force a write
+    SSE_FLUSH_MS: int = int(os.getenv("SSE_FLUSH_MS", "20"))  # Longest an SSE frame waits in that buffer
 
     # Agent Configuration
     ENABLE_WEB_SEARCH: bool = os.getenv("ENABLE_WEB_SEARCH", "True").lower() in ("true", "1", "t")
     SHOW_TOOL_CALLS: bool = os.getenv("SHOW_TOOL_CALLS", "True").lower() in ("true", "1", "t")
     ENABLE_MARKDOWN: bool = os.getenv("ENABLE_MARKDOWN", "True").lower() in ("true", "1", "t")
+    MODEL_TEMPERATURE: float = float(os.getenv("MODEL_TEMPERATURE", "0.7"))  # 0 makes replies deterministic (required by the semantic cache)
     MAX_HISTORY_MESSAGES: int = int(os.getenv("MAX_HISTORY_MESSAGES", "5"))
+    HISTORY_CACHE_SIZE: int = int(os.getenv("HISTORY_CACHE_SIZE", "256"))  # Sessions whose recent turns are kept in memory
+    WEB_SEARCH_TIMEOUT: float = float(os.getenv("WEB_SEARCH_TIMEOUT", "8"))  # Seconds before a web search is abandoned
+    SEARCH_CACHE_TTL: float = float(os.getenv("SEARCH_CACHE_TTL", "600"))  # Seconds a web search result is reused
+    SEARCH_CACHE_MAX: int = int(os.getenv("SEARCH_CACHE_MAX", "512"))  # Cached queries kept (LRU)
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "False").lower() in ("true", "1", "t")
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))  # Cosine similarity for a hit
+    SEMANTIC_CACHE_MAX: int = int(os.getenv("SEMANTIC_CACHE_MAX", "256"))  # Cached responses kept (FIFO)
+    UI_SIMULATED_DELAY_MS: int = int(os.getenv("UI_SIMULATED_DELAY_MS", "0"))  # Cosmetic pacing for simulated streaming; keep 0 in production
 
     # Environment
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
@@ -75,7 +100,7 @@ class Settings:
     @property
     def is_google_api_key_valid(self) -> bool:
         """Check if Google API key is set and seems valid"""
-        return bool(self.GOOGLE_API_KEY and not self.GOOGLE_API_KEY.startswith("your") and len(self.GOOGLE_API_KEY) > 20)
+        return is_valid_google_api_key(self.GOOGLE_API_KEY)
 
     @property
     def is_elevenlabs_valid(self) -> bool:
@@ -103,4 +128,7 @@ class Settings:
             return "none"
 
 # Global settings instance
-settings = Settings() 
\ No newline at end of file
+settings = Settings()
+
+if settings.CLI_HISTORY_MAX < 1:
+    raise ValueError(f"CLI_HISTORY_MAX must be at least 1 (got {settings.CLI_HISTORY_MAX})") 
\ No newline at end of file
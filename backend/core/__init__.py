@@ -1,3 +1,4 @@
 from .memory import MemoryManager, memory_manager
+from .semantic_cache import SemanticCache, semantic_cache
 
-__all__ = ["MemoryManager", "memory_manager"] 
\ No newline at end of file
+__all__ = ["MemoryManager", "memory_manager", "SemanticCache", "semantic_cache"] 
\ No newline at end of file
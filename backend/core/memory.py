@@ -4,10 +4,12 @@ Handles conversation history and other memory-related functionalities.
 Integrates with SQLite for persistent storage and prepares for Mem0.
 """
 import logging
+import asyncio
 import aiosqlite
 import json
+from collections import OrderedDict, deque
 from datetime import datetime
-from typing import List, Tuple, Dict, Any, Optional, Union
+from typing import Deque, List, Set, Tuple, Dict, Any, Optional, Union
 
 from backend.config import settings # Use the new config
 
@@ -35,16 +37,41 @@ class MemoryManager:
             logger.warning(f"Database URL {self.db_url} is not standard SQLite. Assuming it's a valid path for aiosqlite.")
             self.sqlite_path = self.db_url
 
+        # Recent turns per session, so each chat turn doesn't re-read history it just wrote.
+        # Holds the last MAX_HISTORY_MESSAGES (user, agent) pairs; LRU-bounded by HISTORY_CACHE_SIZE sessions.
+        self._history_cache: "OrderedDict[str, Deque[Tuple[str, str]]]" = OrderedDict()
+        # Bumped on every write; a read that raced a write doesn't cache its possibly stale rows
+        self._history_writes = 0
 
-    async def _get_db_connection(self):
-        """Returns an aiosqlite connection object."""
-        # Ensure the directory for the SQLite DB exists
-        if self.sqlite_path != ":memory:":
-            db_path_obj = settings.PROJECT_ROOT / self.sqlite_path
-            db_path_obj.parent.mkdir(parents=True, exist_ok=True)
-            return await aiosqlite.connect(str(db_path_obj))
-        return await aiosqlite.connect(self.sqlite_path)
+        # One long-lived connection, opened on first use and shared by every query.
+        # aiosqlite runs its statements in order on the connection's own thread.
+        self._db: Optional[aiosqlite.Connection] = None
+        self._db_lock = asyncio.Lock()
 
+        # Turn saves still in flight, per session; history reads wait on their session's saves
+        # so a follow-up message never sees history missing the previous turn
+        self._pending_saves: Dict[str, Set[asyncio.Task]] = {}
+
+    async def _get_db_connection(self) -> aiosqlite.Connection:
+        """Returns the shared aiosqlite connection, opening it on first use."""
+        if self._db is None:
+            async with self._db_lock:
+                if self._db is None:
+                    # Ensure the directory for the SQLite DB exists
+                    if self.sqlite_path != ":memory:":
+                        db_path_obj = settings.PROJECT_ROOT / self.sqlite_path
+                        db_path_obj.parent.mkdir(parents=True, exist_ok=True)
+                        self._db = await aiosqlite.connect(str(db_path_obj))
+                    else:
+                        self._db = await aiosqlite.connect(self.sqlite_path)
+        return self._db
+
+    async def close(self):
+        """Waits for pending turn saves, then closes the shared database connection; the next query reopens it."""
+        await self._wait_for_pending_saves()
+        if self._db is not None:
+            db, self._db = self._db, None
+            await db.close()
 
     async def initialize_database(self):
         """
@@ -52,34 +79,26 @@ class MemoryManager:
         Currently creates a 'conversations' table.
         """
         try:
-            # Create fresh connection for initialization
-            if self.sqlite_path != ":memory:":
-                db_path_obj = settings.PROJECT_ROOT / self.sqlite_path
-                db_path_obj.parent.mkdir(parents=True, exist_ok=True)
-                db_path = str(db_path_obj)
-            else:
-                db_path = self.sqlite_path
-                
-            async with aiosqlite.connect(db_path) as db:
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS conversations (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        session_id TEXT DEFAULT 'default', -- For multi-user or session support
-                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        user_message TEXT NOT NULL,
-                        agent_response TEXT NOT NULL,
-                        metadata TEXT  -- JSON string for additional data like tool calls
-                    )
-                """)
-                # Example of a user preferences table (can be expanded)
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS user_preferences (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id TEXT UNIQUE NOT NULL,
-                        preferences TEXT -- JSON string for preferences
-                    )
-                """)
-                await db.commit()
+            db = await self._get_db_connection()
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT DEFAULT 'default', -- For multi-user or session support
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    user_message TEXT NOT NULL,
+                    agent_response TEXT NOT NULL,
+                    metadata TEXT  -- JSON string for additional data like tool calls
+                )
+            """)
+            # Example of a user preferences table (can be expanded)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS user_preferences (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT UNIQUE NOT NULL,
+                    preferences TEXT -- JSON string for preferences
+                )
+            """)
+            await db.commit()
             logger.info(f"📚 Database '{self.sqlite_path}' initialized/verified successfully.")
         except Exception as e:
             logger.error(f"Failed to initialize database at {self.sqlite_path}: {e}", exc_info=True)
@@ -95,24 +114,45 @@ class MemoryManager:
             metadata: Optional dictionary for storing additional context (e.g., tool calls).
         """
         try:
-            # Create fresh connection
-            if self.sqlite_path != ":memory:":
-                db_path_obj = settings.PROJECT_ROOT / self.sqlite_path
-                db_path = str(db_path_obj)
-            else:
-                db_path = self.sqlite_path
-                
-            async with aiosqlite.connect(db_path) as db:
-                await db.execute(
-                    "INSERT INTO conversations (session_id, user_message, agent_response, metadata, timestamp) VALUES (?, ?, ?, ?, ?)",
-                    (session_id, user_message, agent_response, json.dumps(metadata) if metadata else None, datetime.now())
-                )
-                await db.commit()
+            db = await self._get_db_connection()
+            await db.execute(
+                "INSERT INTO conversations (session_id, user_message, agent_response, metadata, timestamp) VALUES (?, ?, ?, ?, ?)",
+                (session_id, user_message, agent_response, json.dumps(metadata) if metadata else None, datetime.now())
+            )
+            await db.commit()
+            self._history_writes += 1
+            cached_turns = self._history_cache.get(session_id)
+            if cached_turns is not None:
+                cached_turns.append((user_message, agent_response))
             logger.debug(f"📝 Conversation turn saved for session {session_id}.")
         except Exception as e:
             logger.error(f"Failed to add conversation turn to DB: {e}", exc_info=True)
 
 
+    def add_conversation_turn_in_background(self, user_message: str, agent_response: str, session_id: str = "default", metadata: dict = None) -> None:
+        """
+        Schedules add_conversation_turn without waiting for it (it logs its own failures).
+        The next get_conversation_history for the session waits for the save to land.
+        """
+        task = asyncio.create_task(self.add_conversation_turn(user_message, agent_response, session_id, metadata))
+        session_saves = self._pending_saves.setdefault(session_id, set())
+        session_saves.add(task)
+
+        def _discard(done: asyncio.Task) -> None:
+            session_saves.discard(done)
+            if not session_saves and self._pending_saves.get(session_id) is session_saves:
+                del self._pending_saves[session_id]
+        task.add_done_callback(_discard)
+
+    async def _wait_for_pending_saves(self, session_id: Optional[str] = None) -> None:
+        """Waits for the session's scheduled turn saves, or every session's when session_id is None."""
+        if session_id is None:
+            tasks = [task for session_saves in self._pending_saves.values() for task in session_saves]
+        else:
+            tasks = list(self._pending_saves.get(session_id, ()))
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     async def get_conversation_history(self, session_id: str = "default", limit: int = settings.MAX_HISTORY_MESSAGES) -> List[Tuple[str, str]]:
         """
         Retrieves the last N conversation turns for a given session.
@@ -124,30 +164,45 @@ class MemoryManager:
         Returns:
             A list of tuples, e.g., [('User', 'Hello'), ('Agent', 'Hi there!')]
         """
-        history = []
+        if session_id in self._pending_saves:
+            await self._wait_for_pending_saves(session_id)
+        window = settings.MAX_HISTORY_MESSAGES
+        if limit <= window:
+            cached_turns = self._history_cache.get(session_id)
+            if cached_turns is not None:
+                self._history_cache.move_to_end(session_id)
+                return self._flatten_turns(list(cached_turns)[-limit:] if limit else [])
+        
         try:
-            # Create fresh connection
-            if self.sqlite_path != ":memory:":
-                db_path_obj = settings.PROJECT_ROOT / self.sqlite_path
-                db_path = str(db_path_obj)
-            else:
-                db_path = self.sqlite_path
-                
-            async with aiosqlite.connect(db_path) as db:
-                async with db.execute(
-                    "SELECT user_message, agent_response FROM conversations WHERE session_id = ? ORDER BY timestamp DESC LIMIT ?",
-                    (session_id, limit)
-                ) as cursor:
-                    rows = await cursor.fetchall()
-                    for row in reversed(rows):  # To maintain chronological order for the prompt
-                        history.append(("User", row[0]))
-                        history.append(("Agent", row[1]))
+            # Within the cached window, fetch the whole window so later turns can be served from memory
+            fetch_limit = window if limit <= window else limit
+            writes_before = self._history_writes
+            db = await self._get_db_connection()
+            async with db.execute(
+                "SELECT user_message, agent_response FROM conversations WHERE session_id = ? ORDER BY timestamp DESC LIMIT ?",
+                (session_id, fetch_limit)
+            ) as cursor:
+                rows = await cursor.fetchall()
+            turns = [(row[0], row[1]) for row in reversed(rows)]  # To maintain chronological order for the prompt
             logger.debug(f"Retrieved {len(rows)} conversation pairs for session {session_id}.")
-            return history
+            if fetch_limit == window and self._history_writes == writes_before:
+                self._history_cache[session_id] = deque(turns, maxlen=window)
+                while len(self._history_cache) > settings.HISTORY_CACHE_SIZE:
+                    self._history_cache.popitem(last=False)
+            return self._flatten_turns(turns[-limit:] if limit else [])
         except Exception as e:
             logger.error(f"Error retrieving conversation history for session {session_id}: {e}", exc_info=True)
             return []
 
+    @staticmethod
+    def _flatten_turns(turns: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Expands (user, agent) pairs into the (speaker, message) list get_conversation_history returns."""
+        history = []
+        for user_message, agent_response in turns:
+            history.append(("User", user_message))
+            history.append(("Agent", agent_response))
+        return history
+
     async def get_formatted_conversation_history(self, session_id: str = "default", limit: int = settings.MAX_HISTORY_MESSAGES) -> str:
         """
         Retrieves the last N conversation turns as a single formatted string.
@@ -0,0 +1,96 @@
+"""
+Semantic Response Cache for AIDEN V2
+Reuses a final agent response for prompts that mean the same thing as an earlier one
+("What is France's capital?" / "Tell me France's capital"), matched by embedding similarity.
+Entries are scoped to the session and history that produced them, so one user's answers are never
+served to another and a follow-up is never answered with a reply to a different conversation.
+Opt-in via SEMANTIC_CACHE_ENABLED; needs numpy, a Google API key for embeddings and MODEL_TEMPERATURE=0.
+"""
+import asyncio
+import logging
+from typing import List, Optional
+
+from backend.config import settings
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_ID = "models/text-embedding-004"
+
+class SemanticCache:
+    """
+    Fixed-size ring buffer of (normalized prompt embedding, scope, response) entries.
+    Lookup is a single matrix-vector product masked to the caller's scope; the oldest
+    entry is overwritten when full.
+    """
+    def __init__(self, threshold: float = settings.SEMANTIC_CACHE_THRESHOLD,
+                 max_entries: int = settings.SEMANTIC_CACHE_MAX):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._matrix = None  # (max_entries, dim) float32, allocated on first insert
+        self._scope_ids = None  # (max_entries,) int64 hashes of each entry's scope
+        self._responses: List[Optional[str]] = [None] * max_entries
+        self._size = 0
+        self._next = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def embed(self, text: str):
+        """Returns the L2-normalized embedding of text, or None if embedding fails."""
+        if genai is None:
+            return None
+        try:
+            result = await asyncio.to_thread(genai.embed_content, model=EMBEDDING_MODEL_ID, content=text)
+        except Exception as e:
+            logger.debug("Semantic cache embedding failed: %s", e)
+            return None
+        vector = np.asarray(result["embedding"], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def lookup(self, vector, scope: str) -> Optional[str]:
+        """Returns the cached response in scope most similar to vector if it clears the threshold."""
+        if self._size:
+            scores = self._matrix[:self._size] @ vector
+            scores[self._scope_ids[:self._size] != hash(scope)] = -1.0
+            best = int(scores.argmax())
+            if scores[best] >= self.threshold:
+                self.hits += 1
+                return self._responses[best]
+        self.misses += 1
+        return None
+
+    def add(self, vector, scope: str, response: str) -> None:
+        """Stores a response for scope, overwriting the oldest entry once the cache is full."""
+        if self._matrix is None:
+            self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            self._scope_ids = np.zeros(self.max_entries, dtype=np.int64)
+        self._matrix[self._next] = vector
+        self._scope_ids[self._next] = hash(scope)
+        self._responses[self._next] = response
+        self._next = (self._next + 1) % self.max_entries
+        self._size = min(self._size + 1, self.max_entries)
+
+# Global instance; None when disabled or when its requirements are missing
+semantic_cache: Optional[SemanticCache] = None
+if settings.SEMANTIC_CACHE_ENABLED:
+    if np is None:
+        logger.warning("SEMANTIC_CACHE_ENABLED is set but numpy is not installed; semantic cache disabled.")
+    elif not settings.is_google_api_key_valid:
+        logger.warning("SEMANTIC_CACHE_ENABLED is set but no valid GOOGLE_API_KEY for embeddings; semantic cache disabled.")
+    elif genai is None:
+        logger.warning("SEMANTIC_CACHE_ENABLED is set but google-generativeai is not installed; semantic cache disabled.")
+    else:
+        if settings.MODEL_TEMPERATURE != 0:
+            logger.warning("SEMANTIC_CACHE_ENABLED is set but MODEL_TEMPERATURE is not 0; only deterministic replies are cached.")
+        genai.configure(api_key=settings.GOOGLE_API_KEY)
+        semantic_cache = SemanticCache()
@@ -2,6 +2,6 @@
 Custom Model Implementations for AIDEN V2
 """
 
-from .openrouter import OpenRouterModel
+from .openrouter import OpenRouterModel, close_shared_clients
 
-__all__ = ['OpenRouterModel'] 
\ No newline at end of file
+__all__ = ['OpenRouterModel', 'close_shared_clients'] 
\ No newline at end of file
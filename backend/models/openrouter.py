@@ -7,7 +7,8 @@ Llama 4 Maverick free model for fastest performance.
 
 import logging
 import os
-from typing import Optional, Dict, Any, AsyncGenerator, List, Union
+import threading
+from typing import Optional, Dict, Any, AsyncGenerator, List, Tuple, Union
 import httpx
 import json
 
@@ -15,6 +16,62 @@ from agno.models.base import Model
 
 logger = logging.getLogger(__name__)
 
+# Generation may legitimately take a while, but an unreachable or saturated provider should
+# fail within seconds so callers can fall back instead of hanging for the full read timeout
+OPENROUTER_TIMEOUT = httpx.Timeout(60.0, connect=5.0, pool=5.0)
+
+# Connection pools shared by every OpenRouterModel with the same endpoint and key, so rebuilding
+# an agent (or falling back from the main to the simple agent) reuses warm TLS connections
+_ASYNC_CLIENTS: Dict[Tuple[str, str], httpx.AsyncClient] = {}
+_SYNC_CLIENTS: Dict[Tuple[str, str], httpx.Client] = {}
+# Models are built and the sync client is used from worker threads; without the lock, concurrent
+# first calls could each create a client and the one that lost the race would never be closed
+_CLIENTS_LOCK = threading.Lock()
+
+
+def _client_headers(api_key: str) -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": "https://github.com/agno-agi/agno",  # Optional: for analytics
+        "X-Title": "AIDEN V2"  # Optional: for analytics
+    }
+
+
+def _shared_async_client(base_url: str, api_key: str) -> httpx.AsyncClient:
+    key = (base_url, api_key)
+    with _CLIENTS_LOCK:
+        client = _ASYNC_CLIENTS.get(key)
+        if client is None or client.is_closed:
+            client = _ASYNC_CLIENTS[key] = httpx.AsyncClient(
+                base_url=base_url, headers=_client_headers(api_key), timeout=OPENROUTER_TIMEOUT
+            )
+    return client
+
+
+def _shared_sync_client(base_url: str, api_key: str) -> httpx.Client:
+    # httpx.Client is safe to share between the worker threads agno's sync run() executes on
+    key = (base_url, api_key)
+    with _CLIENTS_LOCK:
+        client = _SYNC_CLIENTS.get(key)
+        if client is None or client.is_closed:
+            client = _SYNC_CLIENTS[key] = httpx.Client(
+                base_url=base_url, headers=_client_headers(api_key), timeout=OPENROUTER_TIMEOUT
+            )
+    return client
+
+
+async def close_shared_clients() -> None:
+    """Close every shared HTTP pool. Called once at application shutdown."""
+    with _CLIENTS_LOCK:
+        async_clients, sync_clients = list(_ASYNC_CLIENTS.values()), list(_SYNC_CLIENTS.values())
+        _ASYNC_CLIENTS.clear()
+        _SYNC_CLIENTS.clear()
+    for client in async_clients:
+        await client.aclose()
+    for client in sync_clients:
+        client.close()
+
 
 class OpenRouterModel(Model):
     """
@@ -67,17 +124,8 @@ class OpenRouterModel(Model):
         # Additional OpenRouter specific parameters
         self.extra_params = kwargs
         
-        # HTTP client configuration
-        self.client = httpx.AsyncClient(
-            base_url=base_url,
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://github.com/agno-agi/agno",  # Optional: for analytics
-                "X-Title": "AIDEN V2"  # Optional: for analytics
-            },
-            timeout=60.0
-        )
+        # HTTP client configuration (shared pool, see _shared_async_client)
+        self.client = _shared_async_client(base_url, self.api_key)
         
         logger.info(f"Initialized OpenRouter model: {self.id}")
 
@@ -194,45 +242,35 @@ class OpenRouterModel(Model):
         Returns:
             Model response dictionary
         """
-        # For sync version, we'll use the httpx sync client
+        # For sync version, we'll use the shared httpx sync client
         try:
-            # Create a sync client for this request
-            with httpx.Client(
-                base_url=self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                    "HTTP-Referer": "https://github.com/agno-agi/agno",
-                    "X-Title": "AIDEN V2"
-                },
-                timeout=60.0
-            ) as client:
-                # Prepare request payload
-                payload = {
-                    "model": self.id,
-                    "messages": messages,
-                    "temperature": kwargs.get("temperature", self.temperature),
-                    "top_p": kwargs.get("top_p", self.top_p),
-                    "frequency_penalty": kwargs.get("frequency_penalty", self.frequency_penalty),
-                    "presence_penalty": kwargs.get("presence_penalty", self.presence_penalty),
-                    "stream": False
-                }
-                
-                if self.max_tokens:
-                    payload["max_tokens"] = kwargs.get("max_tokens", self.max_tokens)
-                
-                # Add extra parameters
-                payload.update(self.extra_params)
-                payload.update(kwargs)
-                
-                logger.debug(f"Sending sync request to OpenRouter: {self.id}")
-                
-                response = client.post("/chat/completions", json=payload)
-                response.raise_for_status()
-                
-                result = response.json()
-                return result
-                    
+            client = _shared_sync_client(self.base_url, self.api_key)
+            # Prepare request payload
+            payload = {
+                "model": self.id,
+                "messages": messages,
+                "temperature": kwargs.get("temperature", self.temperature),
+                "top_p": kwargs.get("top_p", self.top_p),
+                "frequency_penalty": kwargs.get("frequency_penalty", self.frequency_penalty),
+                "presence_penalty": kwargs.get("presence_penalty", self.presence_penalty),
+                "stream": False
+            }
+            
+            if self.max_tokens:
+                payload["max_tokens"] = kwargs.get("max_tokens", self.max_tokens)
+            
+            # Add extra parameters
+            payload.update(self.extra_params)
+            payload.update(kwargs)
+            
+            logger.debug(f"Sending sync request to OpenRouter: {self.id}")
+            
+            response = client.post("/chat/completions", json=payload)
+            response.raise_for_status()
+            
+            result = response.json()
+            return result
+            
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error from OpenRouter sync: {e.response.status_code} - {e.response.text}")
             raise
@@ -454,20 +492,9 @@ class OpenRouterModel(Model):
             return []
 
     async def close(self):
-        """Close the HTTP client."""
-        if self.client:
-            await self.client.aclose()
-
-    def __del__(self):
-        """Cleanup when object is destroyed."""
-        try:
-            import asyncio
-            if self.client and not self.client.is_closed:
-                # Try to close cleanly if possible
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    loop.create_task(self.client.aclose())
-                else:
-                    asyncio.run(self.client.aclose())
-        except Exception:
-            pass  # Ignore cleanup errors 
\ No newline at end of file
+        """
+        Deliberately closes nothing. This model does not own its HTTP clients: the pools are
+        shared by every OpenRouterModel with the same endpoint and key, and are owned by
+        close_shared_clients(), which the API calls once at shutdown. Scripts that need the
+        connections released should await close_shared_clients() instead.
+        """
@@ -1,6 +1,7 @@
 import subprocess
 import webbrowser
 import os
+import sys
 import time
 
 def print_header():
@@ -12,6 +13,14 @@ def print_header():
     print("**********************************************")
     print("\n")
 
+def clear_screen():
+    """Clears the terminal with an ANSI escape instead of spawning a shell."""
+    if os.name == 'nt':  # Older Windows consoles may not interpret ANSI escapes
+        os.system('cls')
+    else:
+        sys.stdout.write("\x1b[H\x1b[2J")
+        sys.stdout.flush()
+
 def open_url_after_delay(url, delay=3):
     """Opens a URL in the default web browser after a delay."""
     print(f"🕒 Attempting to open {url} in your browser in {delay} seconds...")
@@ -102,7 +111,7 @@ def main_menu():
         print("\nPress Enter to return to the menu...")
         input()
         # Clear screen for better readability (optional, works on most terminals)
-        os.system('cls' if os.name == 'nt' else 'clear')
+        clear_screen()
         print_header()
 
 if __name__ == "__main__":
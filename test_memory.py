@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the conversation history cache and background saves
+"""
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from backend.config import settings
+from backend.core.memory import MemoryManager
+
+async def create_memory_manager(db_dir: str) -> MemoryManager:
+    """A MemoryManager on its own SQLite file, so tests never touch the real history"""
+    manager = MemoryManager(db_url=f"sqlite:///{db_dir}/test_memory.db")
+    await manager.initialize_database()
+    return manager
+
+async def test_read_after_background_save():
+    """A history read right after scheduling a save must include that turn"""
+    print("🧪 Testing history read after a background save...")
+
+    with tempfile.TemporaryDirectory() as db_dir:
+        manager = await create_memory_manager(db_dir)
+        try:
+            # Warm session: its history is served from the in-memory cache
+            assert await manager.get_conversation_history("warm") == []
+            manager.add_conversation_turn_in_background("Hi", "Hello!", session_id="warm")
+            history = await manager.get_conversation_history("warm")
+            assert history == [("User", "Hi"), ("Agent", "Hello!")], history
+
+            # Cold session: nothing cached, read from the database
+            manager.add_conversation_turn_in_background("Ping", "Pong", session_id="cold")
+            history = await manager.get_conversation_history("cold")
+            assert history == [("User", "Ping"), ("Agent", "Pong")], history
+
+            # Another session's pending save doesn't leak into this one
+            manager.add_conversation_turn_in_background("Other", "Reply", session_id="other")
+            assert await manager.get_conversation_history("warm") == [("User", "Hi"), ("Agent", "Hello!")]
+
+            print("✅ Reads see the turn saved just before them")
+            return True
+        except AssertionError as e:
+            print(f"❌ Read after background save failed: {e}")
+            return False
+        finally:
+            await manager.close()
+
+async def test_history_limits():
+    """The cached window and reads beyond it return the same, most recent turns"""
+    print("\n🧪 Testing history limits around the cached window...")
+
+    window = settings.MAX_HISTORY_MESSAGES
+    with tempfile.TemporaryDirectory() as db_dir:
+        manager = await create_memory_manager(db_dir)
+        try:
+            await manager.get_conversation_history("limits")  # Cache the (empty) window
+            for turn in range(window + 3):
+                await manager.add_conversation_turn(f"question {turn}", f"answer {turn}", session_id="limits")
+
+            # Within the window: from the cache, which only keeps the last `window` turns
+            history = await manager.get_conversation_history("limits", limit=2)
+            assert history == [
+                ("User", f"question {window + 1}"), ("Agent", f"answer {window + 1}"),
+                ("User", f"question {window + 2}"), ("Agent", f"answer {window + 2}"),
+            ], history
+
+            # Beyond the window: from the database, including turns the cache no longer holds
+            history = await manager.get_conversation_history("limits", limit=window + 2)
+            assert len(history) == 2 * (window + 2), history
+            assert history[0] == ("User", "question 1") and history[-1] == ("Agent", f"answer {window + 2}"), history
+
+            print("✅ Cached and uncached reads agree")
+            return True
+        except AssertionError as e:
+            print(f"❌ History limit test failed: {e}")
+            return False
+        finally:
+            await manager.close()
+
+async def test_close_drains_pending_saves():
+    """close() must wait for scheduled saves, so no turn is lost at shutdown"""
+    print("\n🧪 Testing that close() drains pending saves...")
+
+    with tempfile.TemporaryDirectory() as db_dir:
+        manager = await create_memory_manager(db_dir)
+        for turn in range(3):
+            manager.add_conversation_turn_in_background(f"question {turn}", f"answer {turn}", session_id="drain")
+        await manager.close()
+
+        reopened = await create_memory_manager(db_dir)
+        try:
+            assert not manager._pending_saves, manager._pending_saves
+            history = await reopened.get_conversation_history("drain")
+            assert len(history) == 6, history
+            print("✅ Every scheduled turn was written before the connection closed")
+            return True
+        except AssertionError as e:
+            print(f"❌ Close drain test failed: {e}")
+            return False
+        finally:
+            await reopened.close()
+
+async def main():
+    """Run all tests"""
+    print("🚀 Starting AIDEN Memory Tests\n")
+
+    results = [
+        await test_read_after_background_save(),
+        await test_history_limits(),
+        await test_close_drains_pending_saves(),
+    ]
+
+    # Summary
+    print(f"\n📊 Test Results:")
+    print(f"✅ Passed: {sum(results)}")
+    print(f"❌ Failed: {len(results) - sum(results)}")
+    return 0 if all(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -5,6 +5,7 @@ Test script to verify streaming functionality
 import asyncio
 import json
 import sys
+import time
 from pathlib import Path
 
 # Add the project root to Python path
@@ -12,8 +13,169 @@ project_root = Path(__file__).resolve().parent
 sys.path.insert(0, str(project_root))
 
 from backend.agent.agent_factory import create_main_agent
+from backend.agent.base_agent import (
+    StreamingAgent, _ChunkBatcher, _current_user_message, _json_preview, _semantic_cache_scope, _stream_batches
+)
 from backend.config import settings
 
+def test_search_query_ignores_history():
+    """The web search query must come from the current message, not from history prepended by the API"""
+    print("🧪 Testing search query extraction with conversation history...")
+    history = "\n".join([
+        "User: Hi there, I'm planning a trip to Europe next month with my family and our two dogs.",
+        "Agent: That sounds wonderful! How can I help you today?",
+        "User: What is the latest news on rail strikes in France?",
+        "Agent: There were several strikes announced for the coming weeks.",
+    ])
+    user_message = "Which museums in Paris allow dogs inside?"
+    # Same layout routes.py uses when it prepends history
+    prompt = f"{history}\n\nUser: {user_message}"
+
+    assert _current_user_message(prompt) == user_message
+    assert _current_user_message(user_message) == user_message
+    query = StreamingAgent._extract_search_query(_current_user_message(prompt))
+    assert query == user_message, f"search query taken from history: {query!r}"
+    print(f"✅ Search query: {query}")
+
+def test_json_preview_oversized_int():
+    """Tool results orjson can't encode (ints wider than 64 bits) still get a preview instead of an error"""
+    print("🧪 Testing tool result preview with an oversized int...")
+    results = [{"title": "Big number", "value": 2 ** 70}]
+    preview = _json_preview(results, 1000)
+    assert json.loads(preview) == results, preview
+    truncated = _json_preview(results * 50, 100)
+    assert len(truncated) == 103 and truncated.endswith("..."), truncated
+    print(f"✅ Preview: {preview}")
+
+def test_semantic_cache_scopes():
+    """Cached replies are only reused within the same session and the same conversation history"""
+    print("🧪 Testing semantic cache scoping...")
+    try:
+        import numpy as np
+    except ImportError:
+        print("⚠️ numpy not installed; skipping semantic cache test")
+        return
+    from backend.core.semantic_cache import SemanticCache
+
+    cache = SemanticCache(threshold=0.9, max_entries=8)
+    tell_me_more = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+    mars_prompt = "User: Tell me about Mars\nAgent: Mars is the fourth planet.\n\nUser: tell me more"
+    venus_prompt = "User: Tell me about Venus\nAgent: Venus is the second planet.\n\nUser: tell me more"
+    cache.add(tell_me_more, _semantic_cache_scope(mars_prompt, "alice"), "More about Mars")
+
+    # Same follow-up after the same history: reused
+    assert cache.lookup(tell_me_more, _semantic_cache_scope(mars_prompt, "alice")) == "More about Mars"
+    # Same follow-up, same session, different history: must not replay the Mars answer
+    assert cache.lookup(tell_me_more, _semantic_cache_scope(venus_prompt, "alice")) is None
+    # Identical prompt in another session: never shared
+    assert cache.lookup(tell_me_more, _semantic_cache_scope(mars_prompt, "bob")) is None
+
+    capital = np.array([0.0, 1.0, 0.0], dtype=np.float32)
+    cache.add(capital, _semantic_cache_scope("What is France's capital?", "alice"), "Paris")
+    assert cache.lookup(capital, _semantic_cache_scope("Tell me France's capital", "alice")) == "Paris"
+    assert cache.lookup(capital, _semantic_cache_scope("Tell me France's capital", "voice-1")) is None
+    print("✅ Semantic cache entries stay within their session and history")
+
+async def _collect_batches(iterator, batcher):
+    """Runs a blocking iterator through _stream_batches; returns [(seconds since start, batch)]."""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    batches = []
+    async for batch in _stream_batches(iterator, batcher):
+        batches.append((loop.time() - start, batch))
+    return batches
+
+async def test_chunk_batching():
+    """Model text is batched, flushed on the deadline and at max size, and the tail survives an error"""
+    print("🧪 Testing model chunk batching...")
+    
+    # Deadline: a paused model (blocking next()) can't hold buffered text back
+    def paused_model():
+        yield "Hello"
+        time.sleep(0.3)
+        yield " world"
+    batches = await _collect_batches(paused_model(), _ChunkBatcher(max_chars=1000, max_delay=0.02))
+    assert batches[0][1] == "Hello" and batches[0][0] < 0.2, f"first batch: {batches[0]}"
+    
+    # Max size: a full batch is yielded straight away; the tail stays in the batcher for the caller
+    batcher = _ChunkBatcher(max_chars=6, max_delay=10)
+    batches = await _collect_batches(iter(["abc", "def", "gh"]), batcher)
+    assert [batch for _, batch in batches] == ["abcdef"], batches
+    assert batcher.flush() == "gh"
+    
+    # Error: the text read before the failure is still in the batcher when the exception propagates
+    def failing_model():
+        yield "partial "
+        yield "answer"
+        raise RuntimeError("stream broke")
+    batcher = _ChunkBatcher(max_chars=1000, max_delay=10)
+    try:
+        await _collect_batches(failing_model(), batcher)
+        raise AssertionError("the error was swallowed")
+    except RuntimeError:
+        pass
+    assert batcher.flush() == "partial answer"
+    print("✅ Chunks flushed on deadline and size, tail kept after an error")
+
+async def _collect_sse_writes(frames):
+    """Runs frames through the SSE coalescer; returns [(seconds since start, written bytes)]."""
+    from backend.api.routes import _coalesce_sse_frames
+    
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    writes = []
+    async for data in _coalesce_sse_frames(frames):
+        writes.append((loop.time() - start, data))
+    return writes
+
+async def test_sse_coalescing():
+    """SSE frames are flushed on the deadline, on urgent frames, at the size limit, and before an error"""
+    print("🧪 Testing SSE frame coalescing...")
+    saved = settings.SSE_FLUSH_BYTES, settings.SSE_FLUSH_MS
+    settings.SSE_FLUSH_BYTES, settings.SSE_FLUSH_MS = 64, 20
+    try:
+        # Deadline: a buffered frame goes out after ~20ms even while the source is quiet
+        async def quiet_after_first():
+            yield b"a", False
+            await asyncio.sleep(0.3)
+            yield b"b", False
+        writes = await _collect_sse_writes(quiet_after_first())
+        assert [data for _, data in writes] == [b"a", b"b"], writes
+        assert writes[0][0] < 0.2, f"first frame held back for {writes[0][0]:.3f}s"
+        
+        # Urgent frame: flushes everything buffered with it, immediately
+        async def with_urgent():
+            yield b"chunk", False
+            yield b"final", True
+            await asyncio.sleep(0.3)
+        writes = await _collect_sse_writes(with_urgent())
+        assert writes[0][1] == b"chunkfinal" and writes[0][0] < 0.2, writes
+        
+        # Size: reaching SSE_FLUSH_BYTES flushes without waiting for the deadline
+        async def large_frames():
+            yield b"x" * 40, False
+            yield b"y" * 40, False
+            await asyncio.sleep(0.3)
+        writes = await _collect_sse_writes(large_frames())
+        assert writes[0][1] == b"x" * 40 + b"y" * 40 and writes[0][0] < 0.2, writes
+        
+        # Error: buffered frames are delivered before the exception propagates
+        from backend.api.routes import _coalesce_sse_frames
+        written = []
+        async def failing():
+            yield b"partial", False
+            raise RuntimeError("stream broke")
+        try:
+            async for data in _coalesce_sse_frames(failing()):
+                written.append(data)
+            raise AssertionError("the error was swallowed")
+        except RuntimeError:
+            pass
+        assert written == [b"partial"], written
+        print("✅ SSE frames flushed on deadline, urgent frame, size limit and before errors")
+    finally:
+        settings.SSE_FLUSH_BYTES, settings.SSE_FLUSH_MS = saved
+
 async def test_streaming():
     """Test the streaming implementation"""
     print("🧪 Testing AIDEN streaming functionality...")
@@ -78,4 +240,9 @@ async def test_streaming():
         traceback.print_exc()
 
 if __name__ == "__main__":
+    test_search_query_ignores_history()
+    test_json_preview_oversized_int()
+    test_semantic_cache_scopes()
+    asyncio.run(test_chunk_batching())
+    asyncio.run(test_sse_coalescing())
     asyncio.run(test_streaming()) 
\ No newline at end of file